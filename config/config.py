@@ -1,16 +1,40 @@
 import os
 from dataclasses import dataclass, field
 from typing import Optional
+from urllib.parse import quote
 from dotenv import load_dotenv
 
 load_dotenv()
 
-@dataclass
+_TRUE_VALUES = frozenset(("true", "1", "yes"))
+
+def _env_bool(name: str, default: str) -> bool:
+    """Ortam değişkenini bool olarak oku ("true", "1", "yes" büyük/küçük harf duyarsız)."""
+    return os.getenv(name, default).lower() in _TRUE_VALUES
+
+# Ayarlar içe aktarmada bir kez okunur; çalışırken değişmez (frozen) ve slots ile öznitelik erişimi doğrudandır
+@dataclass(frozen=True, slots=True)
 class Settings:
     # API Ayarları
     api_host: str = os.getenv("API_HOST", "127.0.0.1")
     api_port: int = int(os.getenv("API_PORT", "8000"))
     api_key: str = os.getenv("API_KEY", "super-secret-key")
+    # Uvicorn çalışan süreç sayısı (uvicorn --workers varsayılan olarak WEB_CONCURRENCY'yi okur)
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Senkron uç noktalar ve run_in_threadpool için AnyIO iş parçacığı havuzu kapasitesi (AnyIO varsayılanı 40)
+    threadpool_size: int = int(os.getenv("THREADPOOL_SIZE", "200"))
+    # Kapak görüntüsü işleme için süreç sayısı (0: süreç havuzu yerine iş parçacığı havuzu kullanılır)
+    image_workers: int = int(os.getenv("IMAGE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    # CORS için izin verilen kaynaklar (virgülle ayrılmış). Web arayüzü aynı kaynaktan sunulur,
+    # bu yüzden varsayılan olarak yalnızca yerel adresler listelenir.
+    allowed_origins: list = field(default_factory=lambda: [
+        origin.strip()
+        for origin in os.getenv(
+            "ALLOWED_ORIGINS",
+            f"http://localhost:{os.getenv('API_PORT', '8000')},http://127.0.0.1:{os.getenv('API_PORT', '8000')}"
+        ).split(",")
+        if origin.strip()
+    ])
     
     # Veritabanı Ayarları
     database_url: str = os.getenv(
@@ -26,7 +50,17 @@ class Settings:
     redis_port: int = int(os.getenv("REDIS_PORT", "6379"))
     redis_db: int = int(os.getenv("REDIS_DB", "0"))
     redis_password: Optional[str] = os.getenv("REDIS_PASSWORD")
+    # Tam bağlantı adresi (ör. docker-compose'daki REDIS_URL); verilirse ayrı ayarlara göre önceliklidir
+    redis_url_env: Optional[str] = os.getenv("REDIS_URL")
     cache_ttl: int = int(os.getenv("CACHE_TTL", "300"))  # 5 dakika varsayılan
+
+    @property
+    def redis_url(self) -> str:
+        """REDIS_URL verilmişse o, aksi halde REDIS_HOST/PORT/DB/PASSWORD ayarlarından oluşturulan bağlantı adresi."""
+        if self.redis_url_env:
+            return self.redis_url_env
+        auth = f":{quote(self.redis_password, safe='')}@" if self.redis_password else ""
+        return f"redis://{auth}{self.redis_host}:{self.redis_port}/{self.redis_db}"
     
     # Elasticsearch Ayarları
     elasticsearch_host: str = os.getenv("ELASTICSEARCH_HOST", "localhost")
@@ -66,32 +100,35 @@ class Settings:
     # Uygulama Ayarları
     app_name: str = os.getenv("APP_NAME", "Kütüphane Yönetim Sistemi")
     app_version: str = os.getenv("APP_VERSION", "2.0.0")
-    debug: bool = os.getenv("DEBUG", "False").lower() in ("true", "1", "yes")
+    debug: bool = _env_bool("DEBUG", "False")
     environment: str = os.getenv("ENVIRONMENT", "development")
     
     # Sayfalama Ayarları
     default_page_size: int = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
     max_page_size: int = int(os.getenv("MAX_PAGE_SIZE", "100"))
     
+    # Kapak Önbelleği Ayarları (başarıyla getirilen kapaklar diske yazılır ve doğrudan sunulur)
+    cover_cache_dir: str = os.getenv("COVER_CACHE_DIR", os.path.join("data", "covers"))
+    
     # Yükleme Ayarları
     max_upload_size: int = int(os.getenv("MAX_UPLOAD_SIZE", "10485760"))  # 10MB
     allowed_image_extensions: list = field(default_factory=lambda: [".jpg", ".jpeg", ".png", ".gif", ".webp"])
     
     # İzleme Ayarları
     sentry_dsn: Optional[str] = os.getenv("SENTRY_DSN")
-    prometheus_enabled: bool = os.getenv("PROMETHEUS_ENABLED", "False").lower() in ("true", "1", "yes")
+    prometheus_enabled: bool = _env_bool("PROMETHEUS_ENABLED", "False")
     
     # Özellik Bayrakları
-    enable_social_features: bool = os.getenv("ENABLE_SOCIAL_FEATURES", "True").lower() in ("true", "1", "yes")
-    enable_recommendations: bool = os.getenv("ENABLE_RECOMMENDATIONS", "True").lower() in ("true", "1", "yes")
-    enable_email_notifications: bool = os.getenv("ENABLE_EMAIL_NOTIFICATIONS", "False").lower() in ("true", "1", "yes")
-    enable_barcode_scanner: bool = os.getenv("ENABLE_BARCODE_SCANNER", "True").lower() in ("true", "1", "yes")
+    enable_social_features: bool = _env_bool("ENABLE_SOCIAL_FEATURES", "True")
+    enable_recommendations: bool = _env_bool("ENABLE_RECOMMENDATIONS", "True")
+    enable_email_notifications: bool = _env_bool("ENABLE_EMAIL_NOTIFICATIONS", "False")
+    enable_barcode_scanner: bool = _env_bool("ENABLE_BARCODE_SCANNER", "True")
     
     # API Özellik Bayrakları
-    enable_google_books: bool = os.getenv("ENABLE_GOOGLE_BOOKS", "True").lower() in ("true", "1", "yes")
-    enable_ai_features: bool = os.getenv("ENABLE_AI_FEATURES", "True").lower() in ("true", "1", "yes")
-    enable_auto_summarization: bool = os.getenv("ENABLE_AUTO_SUMMARIZATION", "True").lower() in ("true", "1", "yes")
-    enable_sentiment_analysis: bool = os.getenv("ENABLE_SENTIMENT_ANALYSIS", "True").lower() in ("true", "1", "yes")
+    enable_google_books: bool = _env_bool("ENABLE_GOOGLE_BOOKS", "True")
+    enable_ai_features: bool = _env_bool("ENABLE_AI_FEATURES", "True")
+    enable_auto_summarization: bool = _env_bool("ENABLE_AUTO_SUMMARIZATION", "True")
+    enable_sentiment_analysis: bool = _env_bool("ENABLE_SENTIMENT_ANALYSIS", "True")
     # AI özet tercih edilen dil (ör. 'tr', 'en')
     ai_summary_language: str = os.getenv("AI_SUMMARY_LANGUAGE", "tr")
 
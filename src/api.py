@@ -1,59 +1,134 @@
 import os
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 import json
+import logging
 import random
 import sqlite3
 import asyncio
-
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from urllib.parse import quote_plus
+
+import anyio
 import httpx
 from fastapi import FastAPI, HTTPException, Body, Query, Depends, Security, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import FileResponse, Response, JSONResponse
+from fastapi.responses import FileResponse, Response, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import APIKeyHeader
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from functools import lru_cache
 import hashlib
+import hmac
 from threading import RLock
 from src.services.http_client import get_http_client, cleanup_http_client
-import xml.etree.ElementTree as ET
+from src.services.image_optimizer import optimize_cover_image
 from contextlib import asynccontextmanager
 
-from src.library import Library, ExternalServiceError
+from src.library import Library, ExternalServiceError, API_BASE_URL, COVERS_BASE
+
+logger = logging.getLogger(__name__)
+
+# orjson varsa varsayılan yanıt sınıfı olarak kullanılır (stdlib json'dan belirgin şekilde hızlı)
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    DefaultJSONResponse = JSONResponse
+    ORJSON_AVAILABLE = False
+
+# ETag özetleri için xxhash (xxh3) tercih edilir; yoksa stdlib blake2b kullanılır.
+# Önbellek doğrulayıcıları kriptografik güç gerektirmez; iki seçenek de SHA-256'dan çok daha hızlıdır.
+try:
+    import xxhash
+
+    def _etag_digest(raw: bytes) -> str:
+        return xxhash.xxh3_64_hexdigest(raw)
+    XXHASH_AVAILABLE = True
+except ImportError:
+    def _etag_digest(raw: bytes) -> str:
+        return hashlib.blake2b(raw, digest_size=8).hexdigest()
+    XXHASH_AVAILABLE = False
+
+# RSS ayrıştırma için lxml (libxml2) tercih edilir; yoksa stdlib ElementTree kullanılır.
+# Harici akışlar güvenilmez olduğundan varlık çözümleme ve ağ erişimi kapalıdır.
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
 from src.book import Book
 from config.config import settings
-from src.database import get_db_connection
+from src.database import (
+    get_db_connection, return_connection_to_pool, close_connection_pool,
+    get_read_connection, return_read_connection, write_transaction,
+)
 
 
 library = Library()
 
+# Kapak görüntüsü işleme için süreç havuzu (lifespan'da başlatılır). CPU yoğun iş GIL'den bağımsız
+# olarak diğer çekirdeklerde çalışır; havuz yoksa iş parçacığı havuzuna düşülür.
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+async def _optimize_cover(content: bytes) -> bytes:
+    """Kapak optimizasyonunu süreç havuzunda (yoksa iş parçacığı havuzunda) çalıştır."""
+    if _image_pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_image_pool, optimize_cover_image, content)
+        except BrokenProcessPool:
+            pass
+    return await run_in_threadpool(optimize_cover_image, content)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Başlangıçta kaynakları başlat
+    global _image_pool
+    # Senkron uç noktaların eşzamanlılık tavanını yükselt (AnyIO varsayılanı 40 iş parçacığıdır)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    # Başlangıçta kaynakları başlat; paylaşılan istemci tüm istekler boyunca yeniden kullanılır
     await get_http_client()
+    # Statik dosyaların içerik tabanlı ETag tablosunu oluştur
+    _static_etags.update(await run_in_threadpool(_build_static_etags))
+    if settings.image_workers > 0:
+        # "spawn": çocuk süreçler çalışan iş parçacıklarını miras almaz ve yalnızca optimizasyon modülünü yükler
+        _image_pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
     try:
         yield
     finally:
+        # Kapanışta takılı kalmayı önlemek için devam eden birleştirilmiş görevleri önce iptal et;
+        # böylece paylaşılan istemci kapanırken hâlâ onu kullanan görev kalmaz.
+        # Sonuçlar toplanmaz, bekleme de en fazla bir saniyeyle sınırlıdır.
+        tasks = list(inflight_tasks.values())
+        inflight_tasks.clear()
+        for t in tasks:
+            t.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=1.0)
         # Kapanışta kaynakları temizle
         try:
             await cleanup_http_client()
         except Exception:
             pass
-        # Kapanışta takılı kalmayı önlemek için devam eden AI görevlerini iptal et
-        try:
-            async with inflight_ai_lock:
-                tasks = list(inflight_ai_tasks.values())
-                inflight_ai_tasks.clear()
-            for t in tasks:
-                t.cancel()
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-        except Exception:
-            pass
+        if _image_pool is not None:
+            _image_pool.shutdown(wait=False, cancel_futures=True)
+            _image_pool = None
+        close_connection_pool()
 
-app = FastAPI(title="Kütüphane Yönetim API'si", lifespan=lifespan)
+app = FastAPI(title="Kütüphane Yönetim API'si", lifespan=lifespan, default_response_class=DefaultJSONResponse)
 
 # --- Performans Ara Katmanı ---
 # 1KB'den büyük yanıtlar için GZip sıkıştırmasını etkinleştir
@@ -62,38 +137,70 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 # --- CORS ---
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # Tarayıcılar ön kontrol (preflight) yanıtlarını 1 gün önbelleğe alır
 )
 
 # --- Özel Önbellek Başlıkları Ara Katmanı ---
+# Yolun ilk bölümüne göre eklenecek önbellek başlıkları (içe aktarmada bir kez oluşturulur)
+_PATH_CACHE_HEADERS: Dict[str, Dict[str, str]] = {
+    "static": {"Cache-Control": "public, max-age=31536000"},  # 1 yıl
+    "covers": {"Cache-Control": "public, max-age=86400"},  # 24 saat
+}
+# Her yanıta eklenen güvenlik başlıkları. İşleyiciler bunları ayarlamadığından, ham (bayt) çiftler
+# olarak önceden kodlanır ve başlık listesine tek seferde eklenir (anahtar başına tarama yapılmaz).
+_SECURITY_HEADERS: Dict[str, str] = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+}
+_SECURITY_RAW_HEADERS: List[Tuple[bytes, bytes]] = [
+    (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in _SECURITY_HEADERS.items()
+]
+
+# /static/... yolu -> içerik özetine dayalı güçlü ETag; başlangıçta bir kez hesaplanır (bkz. lifespan).
+# Özet tüm süreçlerde ve sunucularda aynıdır; dosya değişmedikçe tarayıcılar 304 alır.
+_static_etags: Dict[str, str] = {}
+
+def _build_static_etags(directory: str = "static") -> Dict[str, str]:
+    """Statik dizindeki her dosya için içerik özetinden bir ETag tablosu oluştur."""
+    etags: Dict[str, str] = {}
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                with open(path, "rb") as f:
+                    digest = _etag_digest(f.read())
+            except OSError:
+                continue
+            rel = os.path.relpath(path, directory).replace(os.sep, "/")
+            etags[f"/static/{rel}"] = f'"{digest}"'
+    return etags
+
 @app.middleware("http")
 async def add_cache_headers(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Statik dosyalar için önbellek başlıkları ekle
-    if request.url.path.startswith("/static/"):
-        response.headers["Cache-Control"] = "public, max-age=31536000"  # 1 yıl
-        response.headers["ETag"] = f'"static-{hash(request.url.path)}"'
-    
-    # Kapak resimleri için önbellek başlıkları ekle
-    elif request.url.path.startswith("/covers/"):
-        response.headers["Cache-Control"] = "public, max-age=86400"  # 24 saat
+    path = request.url.path
+    static_etag = _static_etags.get(path)
+    if static_etag is not None and request.headers.get("if-none-match") == static_etag:
+        # Dosya değişmedi; işleyiciyi ve dosya okumayı tamamen atla
+        response = Response(status_code=304, headers={"ETag": static_etag})
+    else:
+        response = await call_next(request)
+        if static_etag is not None:
+            # StaticFiles'ın mtime/boyut tabanlı ETag'i yerine içerik tabanlı ETag
+            response.headers["ETag"] = static_etag
     
-    # Kitap listeleri için ETag ekle (istemci tarafı önbellekleme için)
-    elif request.url.path == "/books" and request.method == "GET":
-        # Kitap sayısına ve son değiştirilme zamanına dayalı basit ETag
-        total_books = len(library.list_books())
-        etag = f'"books-{total_books}-{hash(str(total_books))}"'
-        response.headers["ETag"] = etag
-        response.headers["Cache-Control"] = "public, max-age=60"  # 1 dakika
+    # Statik dosyalar ve kapak resimleri için önbellek başlıkları ekle.
+    # GET /books ETag'ini ve If-None-Match kontrolünü işleyici kendisi yapar (library.version tabanlı).
+    preset = _PATH_CACHE_HEADERS.get(path.split("/", 2)[1])
+    if preset is not None:
+        response.headers.update(preset)
     
-    # Performans başlıkları ekle
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
+    # Güvenlik başlıkları ekle
+    response.raw_headers.extend(_SECURITY_RAW_HEADERS)
     
     return response
 
@@ -102,10 +209,12 @@ async def add_cache_headers(request: Request, call_next):
 
 # --- Güvenlik ---
 api_key_header = APIKeyHeader(name="X-API-Key")
+# Beklenen anahtarın baytları bir kez hesaplanır; karşılaştırma sabit zamanlıdır
+_API_KEY_BYTES = settings.api_key.encode("utf-8")
 
-def get_api_key(api_key: str = Security(api_key_header)):
+async def get_api_key(api_key: str = Security(api_key_header)):
     """API anahtarını doğrulamak için bağımlılık."""
-    if api_key == settings.api_key:
+    if hmac.compare_digest((api_key or "").encode("utf-8"), _API_KEY_BYTES):
         return api_key
     else:
         raise HTTPException(
@@ -113,28 +222,59 @@ def get_api_key(api_key: str = Security(api_key_header)):
             detail="Kimlik bilgileri doğrulanamadı",
         )
 
+def get_db():
+    """İstek süresince havuzdan bir SQLite bağlantısı ödünç veren bağımlılık; iş bitince havuza iade edilir."""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        return_connection_to_pool(conn)
+
+def get_read_db():
+    """Yalnızca okuma yapan uç noktalar için okuma havuzundan salt okunur bağlantı ödünç veren bağımlılık."""
+    conn = get_read_connection()
+    try:
+        yield conn
+    finally:
+        return_read_connection(conn)
+
 # --- Sağlık Kontrolü ---
+# Sağlık yoklamaları sık gelir (her çalışan için birkaç saniyede bir); veritabanı yoklaması ve
+# kitap sayısı _HEALTH_DB_TTL saniye boyunca yeniden kullanılır.
+_HEALTH_DB_TTL = 5.0
+_health_state: Dict[str, Any] = {"db": True, "total_books": 0, "checked_at": float("-inf")}
+
+def _library_version() -> str:
+    """library.version'ı döndür; sürüm veritabanından okunduğu için async uç noktalar iş parçacığı havuzunda çağırır."""
+    return library.version
+
+def _probe_db() -> Tuple[bool, int]:
+    """Veritabanına tek bir sorgu ile eriş; (erişilebilir mi, kitap sayısı) döndür."""
+    try:
+        return True, library.count_books()
+    except Exception:
+        return False, 0
+
 @app.get("/health")
 async def health():
     """Docker ve compose sağlık kontrolleri için hafif sağlık uç noktası.
-    Hızlı bir veritabanı bağlantı denemesi yapar ve özellik bayraklarını döndürür.
+    Önbelleğe alınmış bir veritabanı yoklaması kullanır ve özellik bayraklarını döndürür.
     """
-    db_ok = True
-    try:
-        conn = get_db_connection()
-        conn.execute("SELECT 1")
-        conn.close()
-    except Exception:
-        db_ok = False
+    now = time.monotonic()
+    # Veritabanı yoklaması yalnızca TTL dolunca yapılır
+    if now - _health_state["checked_at"] > _HEALTH_DB_TTL:
+        # Yoklama engelleyicidir; olay döngüsünü meşgul etmemek için iş parçacığı havuzunda çalıştır
+        db_ok, total_books = await run_in_threadpool(_probe_db)
+        _health_state.update(db=db_ok, total_books=total_books, checked_at=now)
     # Test beklentileriyle uyum için 'status' = 'healthy', 'timestamp' ve 'total_books' alanlarını ekle
-    now_iso = datetime.utcnow().isoformat() + "Z"
+    now_iso = _utc_iso_now_sec()
     return {
         "status": "healthy",
         "timestamp": now_iso,
-        "total_books": len(library.list_books()),
+        "total_books": _health_state["total_books"],
         # Geriye dönük uyumluluk için mevcut alanları koru
         "time": now_iso,
-        "db": db_ok,
+        "db": _health_state["db"],
         "services": {
             "google_books": os.getenv("ENABLE_GOOGLE_BOOKS", "false").lower() == "true",
             "hugging_face": os.getenv("ENABLE_AI_FEATURES", "false").lower() == "true",
@@ -157,22 +297,58 @@ def invalidate_cache(prefix: str) -> int:
     """Anahtarları verilen önekle başlayan tüm önbellek girişlerini geçersiz kıl.
     
     Kaldırılan girişlerin sayısını döndürür. Hiçbir anahtar eşleşmese bile çağırmak güvenlidir.
+    "stats:" gibi ':' ile biten önekler bütün kovayı bırakır; "enhanced:<isbn>" gibi tam
+    anahtarlar desen taraması yapılmadan doğrudan silinir.
     """
+    if not prefix.endswith(":"):
+        return int(cache_manager.delete(prefix))
     return cache_manager.invalidate_pattern(f"{prefix}*")
 
-# --- Devam Eden AI Özet Birleştirme ---
-# ISBN başına eşzamanlı AI özet oluşturmalarını tek bir asyncio.Task'ta birleştir
-inflight_ai_tasks: Dict[str, asyncio.Task] = {}
-inflight_ai_lock = asyncio.Lock()
+def invalidate_cache_keys(keys: Sequence[str]) -> int:
+    """Tam önbellek anahtarlarını tek seferde sil (Redis'e tek gidiş; bellekte her anahtar yalnız kendi dilimini kilitler)."""
+    return cache_manager.delete_many(keys)
 
-def _compute_etag_from_dict(payload: Dict[str, Any]) -> str:
-    """Bir sözlük yükünden deterministik olarak güçlü bir ETag hesapla."""
-    try:
-        raw = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
-    except Exception:
-        raw = repr(payload).encode("utf-8")
-    digest = hashlib.sha256(raw).hexdigest()
-    return f'""{digest}"'
+# --- Devam Eden İstek Birleştirme ---
+# Aynı anahtar için eşzamanlı pahalı işlemleri (AI özetleri, harici zenginleştirme) tek bir asyncio.Task'ta birleştir
+inflight_tasks: Dict[str, asyncio.Task] = {}
+
+@lru_cache(maxsize=4096)
+def _ai_summary_etag(isbn: str, generated_at: str | None) -> str:
+    """AI özeti için zayıf ETag; özet yalnızca oluşturulma zamanı değişince değişir.
+
+    (isbn, generated_at) çifti değişmedikçe sonuç aynıdır; eski girdiler zararsızdır.
+    """
+    # ETag içinde boşluğa izin verilmez; SQLite zaman damgasındaki boşluk ISO ayırıcısıyla değiştirilir
+    stamp = str(generated_at or 0).replace(" ", "T")
+    return f'W/"ai-summary-{isbn}-{stamp}"'
+
+_iso_now_cache: Tuple[int, str] = (0, "")
+
+def _iso_now_sec() -> str:
+    """Saniye çözünürlüklü yerel ISO zaman damgası; biçimlendirme saniyede bir kez yapılır."""
+    global _iso_now_cache
+    now = int(time.time())
+    cached = _iso_now_cache
+    if cached[0] != now:
+        cached = _iso_now_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return cached[1]
+
+_utc_iso_now_cache: Tuple[int, str] = (0, "")
+
+def _utc_iso_now_sec() -> str:
+    """_iso_now_sec'in UTC ("Z" sonekli) karşılığı."""
+    global _utc_iso_now_cache
+    now = int(time.time())
+    cached = _utc_iso_now_cache
+    if cached[0] != now:
+        cached = _utc_iso_now_cache = (now, datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    return cached[1]
+
+def _dumps_json(payload: Any) -> bytes:
+    """Yükü JSON baytlarına kodla; mümkünse orjson kullan."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 def _ensure_list_of_str(value: Any) -> list[str] | None:
     """Gelen değeri mümkün olduğunda bir dize listesine zorla; aksi takdirde None.
@@ -226,22 +402,111 @@ def _normalize_enhanced_payload(d: Dict[str, Any]) -> Dict[str, Any]:
         out["language"] = str(v)
     return out
 
+async def _coalesced(key: str, coro_factory):
+    """Anahtar başına tek bir devam eden görevin sonucunu döndür; eşzamanlı çağıranlar aynı görevi bekler.
+
+    Kilit gerekmez: arama ile ekleme arasında await olmadığından tek olay döngüsünde bu adım atomiktir.
+    """
+    task = inflight_tasks.get(key)
+    if task is None or task.done():
+        task = asyncio.create_task(coro_factory())
+        inflight_tasks[key] = task
+
+        def _forget(done: asyncio.Task) -> None:
+            # yalnızca aynı görevse kaldır
+            if inflight_tasks.get(key) is done:
+                inflight_tasks.pop(key, None)
+        task.add_done_callback(_forget)
+    # Bir çağıranın iptali (ör. istemci bağlantıyı kesti) diğer bekleyenlerin görevini iptal etmez
+    return await asyncio.shield(task)
+
 async def _coalesced_generate_ai_summary(isbn: str, coro_factory):
     """ISBN başına tek bir devam eden AI özet oluşturma görevinin sonucunu döndür."""
-    async with inflight_ai_lock:
-        task = inflight_ai_tasks.get(isbn)
-        if task and not task.done():
-            return await task
-        # yeni görev oluştur
-        task = asyncio.create_task(coro_factory())
-        inflight_ai_tasks[isbn] = task
+    return await _coalesced(f"ai_summary:{isbn}", coro_factory)
+
+# --- Kapak LRU Önbelleği ---
+# Sık istenen kapakların baytlarını süreç içinde tutar; tekrar eden istekler harici getirmeyi tamamen atlar.
+# Boş bayt (b"") "kapak bulunamadı" anlamına gelir ve daha kısa bir TTL ile saklanır.
+_COVER_CACHE_MAX = 1024
+_COVER_CACHE_TTL = 3600
+_COVER_MISS_TTL = 300
+_cover_cache: "OrderedDict[str, Tuple[bytes, Dict[str, str], float]]" = OrderedDict()
+
+def _cover_cache_get(key: str) -> Tuple[bytes, Dict[str, str]] | None:
+    """Süresi dolmamışsa önbelleğe alınmış kapak baytlarını ve başlıklarını döndür; aksi takdirde None."""
+    entry = _cover_cache.get(key)
+    if entry is None:
+        return None
+    content, headers, expires_at = entry
+    if time.monotonic() >= expires_at:
+        _cover_cache.pop(key, None)
+        return None
+    _cover_cache.move_to_end(key)
+    return content, headers
+
+# Varsayılan kapak, her eksik kapakta dosyayı yeniden açmamak için içe aktarmada belleğe yüklenir
+try:
+    with open(os.path.join("static", "default-cover.svg"), "rb") as _f:
+        _DEFAULT_COVER_BYTES = _f.read()
+except OSError:
+    _DEFAULT_COVER_BYTES = b""
+_DEFAULT_COVER_HEADERS = {"Cache-Control": "public, max-age=3600"}  # 1 saat önbelleğe al
+
+def _default_cover_response() -> Response:
+    """Önceden yüklenmiş varsayılan kapak SVG'sini döndür."""
+    return Response(content=_DEFAULT_COVER_BYTES, media_type="image/svg+xml", headers=_DEFAULT_COVER_HEADERS)
+
+def _cover_file_path(isbn: str, size: str) -> str | None:
+    """Disk önbelleğindeki kapak dosyasının yolunu döndür; ISBN güvenli değilse None."""
+    if not isbn or not isbn.isalnum():
+        return None
+    return os.path.join(settings.cover_cache_dir, f"{isbn}-{size}.jpg")
+
+def _write_cover_file(path: str, content: bytes) -> None:
+    """Kapak baytlarını atomik olarak diske yaz (yarım dosyalar asla sunulmaz)."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Disk önbelleği isteğe bağlıdır; yazılamazsa bellek önbellekleri yeterlidir
+        pass
+
+async def _stream_cover_to_file(http_client, url: str, path: str) -> bool:
+    """Kapağı belleğe tamponlamadan doğrudan disk önbelleğine akıt; geçerli bir görüntü yazıldıysa True."""
+    tmp_path = f"{path}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    written = 0
     try:
-        return await task
+        async with http_client.stream("GET", url) as upstream:
+            if upstream.status_code != 200:
+                return False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            async with await anyio.open_file(tmp_path, "wb") as f:
+                async for chunk in upstream.aiter_bytes():
+                    await f.write(chunk)
+                    written += len(chunk)
+        # Open Library bulunamayan kapaklar için küçük bir yer tutucu döndürür
+        if written <= 1000:
+            return False
+        os.replace(tmp_path, path)
+        return True
+    except Exception:
+        return False
     finally:
-        async with inflight_ai_lock:
-            # yalnızca aynı görevse kaldır
-            if inflight_ai_tasks.get(isbn) is task:
-                inflight_ai_tasks.pop(isbn, None)
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def _cover_cache_put(key: str, content: bytes, headers: Dict[str, str], ttl_seconds: int = _COVER_CACHE_TTL) -> None:
+    """Kapak baytlarını LRU önbelleğine ekle ve kapasite aşılırsa en eski girişi çıkar."""
+    _cover_cache[key] = (content, headers, time.monotonic() + ttl_seconds)
+    _cover_cache.move_to_end(key)
+    while len(_cover_cache) > _COVER_CACHE_MAX:
+        _cover_cache.popitem(last=False)
 
 # --- Modeller ---
 class BookModel(BaseModel):
@@ -250,6 +515,14 @@ class BookModel(BaseModel):
     isbn: str
     cover_url: str | None = None
 
+# Kitap listeleri satır başına model kurmadan tek bir doğrulama ve tek bir JSON kodlama çağrısıyla işlenir
+_BOOK_LIST_ADAPTER = TypeAdapter(List[BookModel])
+
+def _book_list_response(books: List[Book]) -> Response:
+    """Kitap listesini BookModel şemasına göre toplu olarak doğrula ve JSON yanıtı olarak kodla."""
+    items = _BOOK_LIST_ADAPTER.validate_python([b.to_dict() for b in books])
+    return Response(content=_BOOK_LIST_ADAPTER.dump_json(items), media_type="application/json")
+
 class BookCreateModel(BaseModel):
     isbn: str | None = Field(default=None, description="Otomatik getirme için sağlayın")
     title: str | None = Field(default=None, description="ISBN kullanılmıyorsa manuel başlık")
@@ -320,6 +593,7 @@ def _add_book_to_library(book: Book) -> BookModel:
     """Kütüphaneye bir kitap eklemek ve istisnaları işlemek için yardımcı fonksiyon."""
     try:
         library.add_book(book)
+        invalidate_cache("stats:")
         return BookModel(**book.to_dict())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -332,112 +606,136 @@ def _add_link_headers(response: Response, offset: Optional[int], limit: Optional
     if not response:
         return
     
-    links = []
-    base_url = f"http://{settings.api_host}:{settings.api_port}"
+    # Sayfadan bağımsız sorgu parametreleri bir kez kodlanır ve her bağlantıya eklenir
+    q_part = f"&q={quote_plus(q)}" if q else ""
     
     # Ofset tabanlı sayfalandırma için
     if page is None:
         # Koruma: ofset/limit eksikse, ofset tabanlı başlıkları oluşturmayı atla
         if offset is None or limit is None:
-            response.headers["Link"] = ", ".join(links) if links else ""
+            response.headers["Link"] = ""
             return
-        # Sonraki ve önceki ofsetleri hesapla
-        if offset > 0:
-            prev_offset = max(0, offset - limit)
-            params = [f"offset={prev_offset}", f"limit={limit}"]
-            if q:
-                params.append(f"q={q}")
-            if sort_by:
-                params.append(f"sort_by={sort_by}")
-            if order:
-                params.append(f"order={order}")
-            links.append(f'<{base_url}/books?{"&".join(params)}>; rel="prev"')
-        
-        if offset + limit < total:
-            next_offset = offset + limit
-            params = [f"offset={next_offset}", f"limit={limit}"]
-            if q:
-                params.append(f"q={q}")
-            if sort_by:
-                params.append(f"sort_by={sort_by}")
-            if order:
-                params.append(f"order={order}")
-            links.append(f'<{base_url}/books?{"&".join(params)}>; rel="next"')
-        
-        # İlk sayfa
-        params = [f"offset=0", f"limit={limit}"]
-        if q:
-            params.append(f"q={q}")
-        if sort_by:
-            params.append(f"sort_by={sort_by}")
-        if order:
-            params.append(f"order={order}")
-        links.append(f'<{base_url}/books?{"&".join(params)}>; rel="first"')
-        
-        # Son sayfa
-        last_offset = max(0, total - limit)
-        params = [f"offset={last_offset}", f"limit={limit}"]
-        if q:
-            params.append(f"q={q}")
+        suffix = f"&limit={limit}{q_part}"
         if sort_by:
-            params.append(f"sort_by={sort_by}")
+            suffix += f"&sort_by={sort_by}"
         if order:
-            params.append(f"order={order}")
-        links.append(f'<{base_url}/books?{"&".join(params)}>; rel="last"')
+            suffix += f"&order={order}"
+        template = f"<{API_BASE_URL}/books?offset={{}}{suffix}>; rel=\"{{}}\""
+        links = [
+            # Önceki ve sonraki ofsetler yalnızca varsa eklenir
+            template.format(max(0, offset - limit), "prev") if offset > 0 else None,
+            template.format(offset + limit, "next") if offset + limit < total else None,
+            template.format(0, "first"),
+            template.format(max(0, total - limit), "last"),
+        ]
     
     # Sayfa tabanlı sayfalandırma için
     else:
         # Koruma: sayfa tabanlı başlıklar kullanırken sayfa boyutunun sağlandığından emin ol
         if page_size is None:
-            response.headers["Link"] = ", ".join(links) if links else ""
+            response.headers["Link"] = ""
             return
         total_pages = (total + page_size - 1) // page_size
-        
-        if page > 1:
-            params = [f"page={page - 1}", f"page_size={page_size}"]
-            if q:
-                params.append(f"q={q}")
-            links.append(f'<{base_url}/books/paginated?{"&".join(params)}>; rel="prev"')
-        
-        if page < total_pages:
-            params = [f"page={page + 1}", f"page_size={page_size}"]
-            if q:
-                params.append(f"q={q}")
-            links.append(f'<{base_url}/books/paginated?{"&".join(params)}>; rel="next"')
-        
-        # İlk sayfa
-        params = [f"page=1", f"page_size={page_size}"]
-        if q:
-            params.append(f"q={q}")
-        links.append(f'<{base_url}/books/paginated?{"&".join(params)}>; rel="first"')
-        
-        # Son sayfa
-        params = [f"page={total_pages}", f"page_size={page_size}"]
-        if q:
-            params.append(f"q={q}")
-        links.append(f'<{base_url}/books/paginated?{"&".join(params)}>; rel="last"')
+        template = f"<{API_BASE_URL}/books/paginated?page={{}}&page_size={page_size}{q_part}>; rel=\"{{}}\""
+        links = [
+            template.format(page - 1, "prev") if page > 1 else None,
+            template.format(page + 1, "next") if page < total_pages else None,
+            template.format(1, "first"),
+            template.format(total_pages, "last"),
+        ]
     
-    if links:
-        response.headers["Link"] = ", ".join(links)
+    response.headers["Link"] = ", ".join(link for link in links if link)
+
+def _not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """İstemcinin If-None-Match değeri ETag ile eşleşiyorsa gövdesiz 304 yanıtı döndür."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+_COVER_FILE_CACHE_CONTROL = "public, max-age=86400"
+
+def _cover_file_response(request: Request, path: str, isbn: str, size: str, st: os.stat_result) -> Response:
+    """Disk önbelleğindeki kapağı sun; ETag dosya damgasından türetilir ve tüm süreçlerde aynıdır."""
+    etag = f'"cover-{isbn}-{size}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+    not_modified = _not_modified(request, etag, _COVER_FILE_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    return FileResponse(
+        path,
+        media_type="image/jpeg",
+        headers={"Cache-Control": _COVER_FILE_CACHE_CONTROL, "ETag": etag},
+        stat_result=st
+    )
 
 # --- API Uç Noktaları ---
 @app.get("/covers/{isbn}")
-async def get_book_cover(isbn: str, size: Optional[str] = Query("L", description="Kapak boyutu: S, M, L")):
+async def get_book_cover(request: Request, isbn: str, size: Optional[str] = Query("L", description="Kapak boyutu: S, M, L")):
     """Optimizasyon ve önbellekleme ile Open Library'den kitap kapağını proxy'le."""
     # Boyut parametresini doğrula
     if size not in ["S", "M", "L"]:
         size = "L"
     
-    # Önce önbelleği kontrol et
     cache_key = f"cover:{isbn}:{size}"
+
+    # Önce disk önbelleğini kontrol et; dosya doğrudan (sendfile ile) sunulur
+    cover_path = _cover_file_path(isbn, size)
+    if cover_path:
+        try:
+            st = os.stat(cover_path)
+        except OSError:
+            st = None
+        if st is not None:
+            return _cover_file_response(request, cover_path, isbn, size, st)
+
+    # Ardından süreç içi LRU önbelleğini kontrol et
+    lru_hit = _cover_cache_get(cache_key)
+    if lru_hit is not None:
+        content, headers = lru_hit
+        if not content:
+            # Yakın zamanda bulunamadı olarak işaretlendi; harici getirmeyi tekrar deneme
+            return _default_cover_response()
+        not_modified = _not_modified(request, headers.get("ETag", ""), headers.get("Cache-Control", _COVER_FILE_CACHE_CONTROL))
+        if not_modified is not None:
+            return not_modified
+        return Response(content=content, media_type="image/jpeg", headers=headers)
+
+    # Ardından paylaşılan önbelleği kontrol et
     cached_response = get_cached_response(cache_key)
     if cached_response:
+        _cover_cache_put(cache_key, cached_response["content"], cached_response["headers"])
+        headers = cached_response["headers"]
+        not_modified = _not_modified(request, headers.get("ETag", ""), headers.get("Cache-Control", _COVER_FILE_CACHE_CONTROL))
+        if not_modified is not None:
+            return not_modified
         return Response(
             content=cached_response["content"],
             media_type=cached_response["media_type"],
             headers=cached_response["headers"]
         )
     
+    # Aynı kapak için eşzamanlı soğuk önbellek istekleri tek bir harici getirmeyi paylaşır
+    result = await _coalesced(cache_key, lambda: _fetch_cover(isbn, size, cache_key, cover_path))
+    if result is None:
+        return _default_cover_response()
+    if isinstance(result, str):
+        return _cover_file_response(request, result, isbn, size, os.stat(result))
+    content, headers = result
+    return Response(content=content, media_type="image/jpeg", headers=headers)
+
+async def _fetch_cover(isbn: str, size: str, cache_key: str, cover_path: str | None):
+    """Kapağı Open Library'den getir ve önbelleklere yaz.
+
+    Disk dosyasının yolunu, (bayt, başlıklar) ikilisini ya da kapak yoksa None döndürür.
+    """
+    # S/M kapaklar işlenmeden sunulur; gövdeyi belleğe almadan doğrudan diske akıt
+    if size != "L" and cover_path:
+        http_client = await get_http_client()
+        cover_url = f"https://covers.openlibrary.org/b/isbn/{isbn}-{size}.jpg"
+        if await _stream_cover_to_file(http_client, cover_url, cover_path):
+            return cover_path
+        _cover_cache_put(cache_key, b"", {}, ttl_seconds=_COVER_MISS_TTL)
+        return None
+
     # Daha iyi kalite için farklı boyutları dene, en büyükten başlayarak
     if size == "L":
         # Önce XL'yi dene, sonra L'yi yedek olarak kullan
@@ -448,11 +746,11 @@ async def get_book_cover(isbn: str, size: Optional[str] = Query("L", description
     else:
         cover_urls = [f"https://covers.openlibrary.org/b/isbn/{isbn}-{size}.jpg"]
     
-    # Çalışan bir tane bulana kadar her URL'yi dene
+    # Çalışan bir tane bulana kadar her URL'yi dene (bağlantı havuzu tüm denemelerde paylaşılır)
+    http_client = await get_http_client()
     response = None
     for cover_url in cover_urls:
         try:
-            http_client = await get_http_client()
             temp_response = await http_client.get_with_retry(cover_url, retries=1, backoff=0.2)
             if temp_response and temp_response.status_code == 200 and len(temp_response.content) > 1000:
                 response = temp_response
@@ -460,17 +758,10 @@ async def get_book_cover(isbn: str, size: Optional[str] = Query("L", description
         except Exception:
             continue
     
-    # Hiçbir URL çalışmazsa, varsayılan kapağı döndür
+    # Hiçbir URL çalışmazsa eksikliği kısa süreliğine hatırla; çağıran varsayılan kapağı sunar
     if not response:
-        default_headers = {
-            "Cache-Control": "public, max-age=3600",
-            "Content-Type": "image/svg+xml"
-        }
-        return FileResponse(
-            'static/default-cover.svg', 
-            media_type="image/svg+xml",
-            headers=default_headers
-        )
+        _cover_cache_put(cache_key, b"", {}, ttl_seconds=_COVER_MISS_TTL)
+        return None
     
     try:
         
@@ -479,46 +770,13 @@ async def get_book_cover(isbn: str, size: Optional[str] = Query("L", description
             optimized_content = response.content
             media_type = "image/jpeg"
             
-            # Büyük kapaklar için akıllı optimizasyon uygula
+            # Büyük kapaklar için akıllı optimizasyon uygula (CPU yoğun; olay döngüsü dışında çalışır)
             if size == "L" and len(response.content) > 50000:  # > 50KB eşiği
-                try:
-                    from PIL import Image
-                    import io
-                    
-                    # Görüntüyü aç ve optimize et
-                    image = Image.open(io.BytesIO(response.content))
-                    
-                    # Gerekirse RGB'ye dönüştür
-                    if image.mode in ("RGBA", "P"):
-                        image = image.convert("RGB")
-                    
-                    # Daha iyi kalitede yeniden boyutlandır - daha keskin görüntü için artırılmış maksimum genişlik
-                    max_width = 900  # Daha iyi kalite için 700'den artırıldı
-                    if image.width > max_width:
-                        ratio = max_width / image.width
-                        new_height = int(image.height * ratio)
-                        # Yüksek kaliteli yeniden boyutlandırma için LANCZOS kullan
-                        image = image.resize((max_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Daha iyi kalite için görüntüyü keskinleştir
-                    from PIL import ImageFilter
-                    image = image.filter(ImageFilter.UnsharpMask(radius=2, percent=125, threshold=3))
-                    
-                    # Optimize edilmiş görüntüyü daha yüksek kalitede kaydet
-                    output = io.BytesIO()
-                    image.save(output, format="JPEG", quality=95, optimize=True)
-                    optimized_content = output.getvalue()
-                    
-                except ImportError:
-                    # PIL mevcut değil, orijinal içeriği kullan
-                    pass
-                except Exception:
-                    # Görüntü işleme başarısız oldu, orijinal içeriği kullan
-                    pass
+                optimized_content = await _optimize_cover(response.content)
             
             headers = {
                 "Cache-Control": "public, max-age=86400",  # 24 saat önbelleğe al
-                "ETag": f'"cover-{isbn}-{size}-{hash(optimized_content)}"',
+                "ETag": f'"cover-{isbn}-{size}-{_etag_digest(optimized_content)}"',  # süreçler arasında kararlı
                 "Content-Length": str(len(optimized_content))
             }
             
@@ -528,36 +786,29 @@ async def get_book_cover(isbn: str, size: Optional[str] = Query("L", description
                 "media_type": media_type,
                 "headers": headers
             }, ttl_seconds=3600)
+            _cover_cache_put(cache_key, optimized_content, headers)
+            if cover_path:
+                await run_in_threadpool(_write_cover_file, cover_path, optimized_content)
             
-            return Response(
-                content=optimized_content,
-                media_type=media_type,
-                headers=headers
-            )
-        else:
-            # Uygun önbellekleme ile varsayılan kapağı döndür
-            default_headers = {
-                "Cache-Control": "public, max-age=3600",  # 1 saat önbelleğe al
-                "Content-Type": "image/svg+xml"
-            }
-            return FileResponse(
-                'static/default-cover.svg', 
-                media_type="image/svg+xml",
-                headers=default_headers
-            )
-    except Exception as e:
-        # Hata durumunda varsayılan kapağı döndür
-        return FileResponse(
-            'static/default-cover.svg', 
-            media_type="image/svg+xml",
-            headers={"Cache-Control": "public, max-age=3600"}
-        )
+            return optimized_content, headers
+        return None
+    except Exception:
+        # Hata durumunda varsayılan kapak sunulur
+        return None
+
+# /stats yanıtı kısa bir süre önbellekte tutulur; kitap ekleme/silme/güncelleme "stats:" önekini geçersiz kılar
+STATS_CACHE_TTL = 2
 
-@app.get("/stats", response_model=StatsModel)
+@app.get("/stats", response_model=None, responses={200: {"model": StatsModel}})
 def get_library_stats():
     """Kütüphane hakkında temel istatistikleri al."""
-    stats = library.get_statistics()
-    return StatsModel(total_books=stats["total_books"], unique_authors=stats["unique_authors"])
+    cache_key = "stats:basic"
+    stats = get_cached_response(cache_key)
+    if stats is None:
+        stats = library.get_statistics()
+        cache_response(cache_key, stats, ttl_seconds=STATS_CACHE_TTL)
+    # Şekil zaten StatsModel ile aynı; yanıt modeli doğrulamasını atlamak için doğrudan sözlük döndür
+    return {"total_books": stats["total_books"], "unique_authors": stats["unique_authors"]}
 
 # --- Sayfalandırma Modelleri ---
 class PaginatedResponse(BaseModel):
@@ -578,9 +829,42 @@ class AdvancedSearchParams(BaseModel):
     tag_ids: Optional[List[int]] = None
     min_rating: Optional[float] = None
 
-@app.get("/books", response_model=List[EnhancedBookModel])
+# (kütüphane sürümü, sorgu anahtarı) -> (kodlanmış JSON gövdesi, toplam kitap sayısı).
+# Sürüm her yazmada değiştiği için eski girişler hiçbir zaman eşleşmez ve LRU sırasıyla düşer.
+_BOOKS_JSON_CACHE_MAX = 64
+_books_json_cache: "OrderedDict[Tuple[str, str], Tuple[bytes, int]]" = OrderedDict()
+
+# (kütüphane sürümü, ISBN) -> normalleştirilmiş kitap sözlüğü. Aynı sürümdeki farklı sıralama/sayfa
+# istekleri satırları yeniden normalleştirmez; sürüm değişince eski girişler LRU sırasıyla düşer.
+_BOOK_PAYLOAD_CACHE_MAX = 4096
+_book_payload_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+def _book_payload(version: str, book: Book) -> Dict[str, Any]:
+    """Kitabın normalleştirilmiş yükünü döndür; aynı sürüm için önbellekten.
+
+    /books, /books/{isbn}/enhanced ve benzer kitaplar aynı girdileri paylaşır. Çağıranlar sözlüğü
+    değiştirmemelidir. İş parçacığı havuzundan da çağrıldığından eşzamanlı çıkarmalar hoş görülür.
+    """
+    key = (version, book.isbn)
+    payload = _book_payload_cache.get(key)
+    if payload is None:
+        payload = _normalize_enhanced_payload(book.to_dict())
+        _book_payload_cache[key] = payload
+        while len(_book_payload_cache) > _BOOK_PAYLOAD_CACHE_MAX:
+            try:
+                _book_payload_cache.popitem(last=False)
+            except KeyError:
+                break
+    else:
+        try:
+            _book_payload_cache.move_to_end(key)
+        except KeyError:
+            pass
+    return payload
+
+@app.get("/books", response_model=None, responses={200: {"model": List[EnhancedBookModel]}})
 def get_books(
-    response: Response,
+    request: Request,
     q: Optional[str] = Query(None, description="Arama sorgusu"),
     sort_by: Optional[str] = Query("title", description="Sıralama alanı: title|author|created_at"),
     order: Optional[str] = Query("asc", description="Sıralama düzeni: asc|desc"),
@@ -595,44 +879,57 @@ def get_books(
         raise HTTPException(status_code=400, detail="Geçersiz sort_by. İzin verilenler: title, author, created_at")
     if order not in allowed_order:
         raise HTTPException(status_code=400, detail="Geçersiz order. İzin verilenler: asc, desc")
-    # Önce önbelleği kontrol et
     cache_key = f"books:{q}:{sort_by}:{order}:{limit}:{offset}"
-    cached = get_cached_response(cache_key)
-    if cached:
-        # Sayfalandırma için Link başlıkları ekle
-        total_books = len(library.list_books()) if not q else len(library.search_books(q))
-        _add_link_headers(response, offset, limit, total_books, q, sort_by, order)
-        return cached
-    
-    if q:
-        books = library.search_books(q)
+    # Kütüphane sürümü ve sorgu parametrelerinden türetilen zayıf ETag; tekrarlanan yoklamalar 304 alır
+    version = library.version
+    etag = f'W/"books-{version}-{zlib.crc32(cache_key.encode("utf-8")):08x}"'
+    cache_control = "public, max-age=60"
+    not_modified = _not_modified(request, etag, cache_control)
+    if not_modified is not None:
+        return not_modified
+
+    # Aynı sürüm ve parametreler için önceden kodlanmış JSON gövdesini yeniden kullan
+    json_cache_key = (version, cache_key)
+    cached = _books_json_cache.get(json_cache_key)
+    if cached is None:
+        if q:
+            books = library.search_books(q)
+            
+            # Sıralamayı uygula
+            reverse_order = (order == "desc")
+            if sort_by == "title":
+                books.sort(key=lambda b: b.title.lower(), reverse=reverse_order)
+            elif sort_by == "author":
+                books.sort(key=lambda b: b.author.lower(), reverse=reverse_order)
+            elif sort_by == "created_at":
+                books.sort(key=lambda b: b.created_at or "", reverse=reverse_order)
+            
+            total_books = len(books)
+            
+            # Sayfalandırmayı uygula
+            paginated_books = books[offset:offset + limit]
+        else:
+            # Aramasız listeleme önceden sıralanmış ISBN dizinini kullanır; yalnızca sayfa yüklenir
+            paginated_books, total_books = library.list_books_sorted(sort_by, order, offset, limit, version=version)
+        # Her kitap için geliştirilmiş alanları doğrudan döndür (normalleştirilmiş).
+        # Veriler veritabanından geldiği ve zaten normalleştirildiği için model doğrulamasını atla.
+        payload = [_book_payload(version, b) for b in paginated_books]
+        body = _dumps_json(payload)
+        cached = (body, total_books)
+        _books_json_cache[json_cache_key] = cached
+        while len(_books_json_cache) > _BOOKS_JSON_CACHE_MAX:
+            _books_json_cache.popitem(last=False)
     else:
-        books = library.list_books()
-    
-    # Sıralamayı uygula
-    reverse_order = (order == "desc")
-    if sort_by == "title":
-        books.sort(key=lambda b: b.title.lower(), reverse=reverse_order)
-    elif sort_by == "author":
-        books.sort(key=lambda b: b.author.lower(), reverse=reverse_order)
-    elif sort_by == "created_at":
-        books.sort(key=lambda b: b.created_at or "", reverse=reverse_order)
-    
-    total_books = len(books)
-    
-    # Sayfalandırmayı uygula
-    paginated_books = books[offset:offset + limit]
-    # Her kitap için geliştirilmiş alanları doğrudan döndür (normalleştirilmiş)
-    result = [
-        EnhancedBookModel(**_normalize_enhanced_payload(b.to_dict()))
-        for b in paginated_books
-    ]
+        _books_json_cache.move_to_end(json_cache_key)
     
+    body, total_books = cached
+    result = Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
     # Link başlıkları ekle
-    _add_link_headers(response, offset, limit, total_books, q, sort_by, order)
-    
-    # Sonucu önbelleğe al
-    cache_response(cache_key, result, ttl_seconds=60)
+    _add_link_headers(result, offset, limit, total_books, q, sort_by, order)
     return result
 
 @app.get("/books/paginated", response_model=PaginatedResponse)
@@ -643,23 +940,25 @@ def get_books_paginated(
     page_size: int = Query(20, ge=1, le=100, description="Sayfa başına öğe"),
 ):
     """Kitapların sayfalandırılmış listesini al."""
+    start = (page - 1) * page_size
     if q:
         books = library.search_books(q)
+        total = len(books)
+        paginated_books = books[start:start + page_size]
     else:
-        books = library.list_books()
-    
-    total = len(books)
+        # Yalnızca istenen sayfa okunur; toplam COUNT(*) ile alınır
+        total = library.count_books()
+        paginated_books = list(library.iter_books(start, page_size))
     total_pages = (total + page_size - 1) // page_size
-    start = (page - 1) * page_size
-    end = start + page_size
-    
-    paginated_books = books[start:end]
     
     # Link başlıkları ekle
     _add_link_headers(response, None, None, total, q, None, None, page, page_size)
     
     return PaginatedResponse(
-        items=[BookModel(**b.to_dict()) for b in paginated_books],
+        items=[
+            BookModel.model_construct(title=b.title, author=b.author, isbn=b.isbn, cover_url=b.cover_url)
+            for b in paginated_books
+        ],
         total=total,
         page=page,
         page_size=page_size,
@@ -667,6 +966,74 @@ def get_books_paginated(
     )
 
 # --- Harici Haber Akışları (Anahtarsız) ---
+# Ad alanları (varsa resimler için medya ad alanı kullanılır)
+_RSS_NS = {"media": "http://search.yahoo.com/mrss/"}
+
+def _new_rss_parser():
+    """Yalnızca kapanan <item> öğelerini bildiren artımlı (pull) RSS ayrıştırıcısı oluştur."""
+    if LXML_AVAILABLE:
+        return ET.XMLPullParser(events=("end",), tag="item", resolve_entities=False, no_network=True)
+    return ET.XMLPullParser(events=("end",))
+
+def _drain_rss_items(parser, items: List[Dict[str, Any]]) -> None:
+    """Tamamlanan öğeleri sözlüğe çevir ve ağacı büyütmemek için hemen temizle."""
+    for _event, item in parser.read_events():
+        if item.tag != "item":
+            continue
+        # Medya:içeriğini dene; bazı akışlar medya:küçük resim kullanır
+        media_el = item.find("media:content", _RSS_NS)
+        image_url = media_el.get("url") if media_el is not None else None
+        if not image_url:
+            thumb_el = item.find("media:thumbnail", _RSS_NS)
+            if thumb_el is not None:
+                image_url = thumb_el.get("url")
+
+        items.append({
+            "title": (item.findtext("title") or "").strip(),
+            "link": (item.findtext("link") or "").strip(),
+            "published_at": (item.findtext("pubDate") or "").strip(),
+            "summary": (item.findtext("description") or "").strip(),
+            "image": image_url
+        })
+        item.clear()
+
+async def _stream_rss_items(http_client, url: str, retries: int = 2, backoff: float = 0.4) -> Optional[List[Dict[str, Any]]]:
+    """RSS gövdesini belleğe almadan parça parça ayrıştır; akış alınamazsa None döndür.
+
+    Bozuk XML, çağıranın ayırt edebilmesi için SyntaxError (ParseError) olarak yükseltilir.
+    """
+    for attempt in range(retries):
+        parser = _new_rss_parser()
+        items: List[Dict[str, Any]] = []
+        try:
+            async with http_client.stream("GET", url) as upstream:
+                if upstream.status_code != 200:
+                    return None
+                async for chunk in upstream.aiter_bytes():
+                    parser.feed(chunk)
+                    _drain_rss_items(parser, items)
+            parser.close()
+            _drain_rss_items(parser, items)
+            return items
+        except httpx.RequestError:
+            if attempt < retries - 1:
+                await asyncio.sleep(backoff * (2 ** attempt))
+    return None
+
+_RSS_MIN_DATE = datetime.min.replace(tzinfo=timezone.utc)
+
+def _rss_published_at(item: Dict[str, Any]) -> datetime:
+    """Sıralama için yayın tarihini saat dilimli datetime'a çevir; okunamazsa en eski tarihi ver."""
+    date_str = item.get("published_at")
+    if not date_str:
+        return _RSS_MIN_DATE
+    try:
+        dt = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError):
+        return _RSS_MIN_DATE
+    # Tutarlı karşılaştırma için saat dilimi olmayan tarihler UTC kabul edilir
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
 @app.get("/news/books/nyt")
 async def get_nyt_books_news(
     limit: int = Query(5, ge=1, le=20),
@@ -675,95 +1042,36 @@ async def get_nyt_books_news(
     """NYT Books RSS akışını JSON'a proxy'le ve ayrıştır.
 
     En son kitapla ilgili makaleleri döndürür: başlık, bağlantı, yayınlanma tarihi, özet, resim (varsa).
-    Harici istekleri azaltmak için bellek içi TTL önbelleği kullanır.
+    Sıralanmış akış tek anahtar altında önbelleğe alınır; farklı limitler aynı kopyadan kırpılır.
     """
     RSS_URL = "https://rss.nytimes.com/services/xml/rss/nyt/Books.xml"
-    cache_key = f"v2:news:nyt:books:{limit}"
+    cache_key = "v2:news:nyt:books:feed"
     
     if force_refresh:
         cache_manager.delete(cache_key)
 
     cached = get_cached_response(cache_key)
     if cached is not None:
-        return JSONResponse(
-            content=cached,
+        return DefaultJSONResponse(
+            content=cached[:limit],
             headers={"Cache-Control": "public, max-age=300"}
         )
 
     try:
         http_client = await get_http_client()
-        resp = await http_client.get_with_retry(RSS_URL, retries=2, backoff=0.4)
-        if not resp or resp.status_code != 200 or not resp.text:
-            raise HTTPException(status_code=502, detail="NYT RSS akışı getirilemedi")
-
-        # XML'i güvenli bir şekilde ayrıştır
+        # XML akış gelirken güvenli bir şekilde ayrıştırılır
         try:
-            root = ET.fromstring(resp.text)
-        except Exception:
+            items = await _stream_rss_items(http_client, RSS_URL)
+        except SyntaxError:
             raise HTTPException(status_code=502, detail="NYT RSS akışı ayrıştırılamadı")
+        if items is None:
+            raise HTTPException(status_code=502, detail="NYT RSS akışı getirilemedi")
 
-        # Metni güvenli bir şekilde çıkarmak ve kırpmak için yardımcı
-        def _t(el):
-            if el is None:
-                return ""
-            try:
-                return (el.text or "").strip()
-            except Exception:
-                return ""
-
-        # Ad alanları (varsa resimler için medya ad alanı kullanılır)
-        ns = {"media": "http://search.yahoo.com/mrss/"}
-        channel = root.find("channel")
-        items = []
-        if channel is not None:
-            for item in channel.findall("item"):
-                title_el = item.find("title")
-                link_el = item.find("link")
-                pub_el = item.find("pubDate")
-                desc_el = item.find("description")
-                # Medya:içeriğini dene
-                media_el = item.find("media:content", ns)
-                image_url = None
-                if media_el is not None:
-                    image_url = media_el.attrib.get("url")
-                # Bazı akışlar medya:küçük resim kullanır
-                if not image_url:
-                    thumb_el = item.find("media:thumbnail", ns)
-                    if thumb_el is not None:
-                        image_url = thumb_el.attrib.get("url")
-
-                items.append({
-                    "title": _t(title_el),
-                    "link": _t(link_el),
-                    "published_at": _t(pub_el),
-                    "summary": _t(desc_el),
-                    "image": image_url
-                })
-
-        from email.utils import parsedate_to_datetime
-        from datetime import datetime, timezone
-
-        # Tarihe göre sırala (en yeni en başta)
-        def get_date(item):
-            date_str = item.get('published_at')
-            if not date_str:
-                return datetime.min.replace(tzinfo=timezone.utc)
-            try:
-                dt = parsedate_to_datetime(date_str)
-                # Make sure datetime is timezone-aware for consistent comparison
-                if dt.tzinfo is None:
-                    return dt.replace(tzinfo=timezone.utc)
-                return dt
-            except (TypeError, ValueError):
-                return datetime.min.replace(tzinfo=timezone.utc)
-
-        items.sort(key=get_date, reverse=True)
-
-        # Kırp ve önbelleğe al
-        result = items[:limit]
-        cache_response(cache_key, result, ttl_seconds=300)
-        return JSONResponse(
-            content=result,
+        # Tarihe göre sırala (en yeni en başta); kırpma önbellekten sonra yapılır
+        items.sort(key=_rss_published_at, reverse=True)
+        cache_response(cache_key, items, ttl_seconds=300)
+        return DefaultJSONResponse(
+            content=items[:limit],
             headers={"Cache-Control": "public, max-age=300"}
         )
     except HTTPException:
@@ -771,24 +1079,24 @@ async def get_nyt_books_news(
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"NYT Books haberleri getirilemedi: {str(e)}")
 
-@app.post("/books/search/advanced", response_model=List[BookModel])
+@app.post("/books/search/advanced", response_model=None, responses={200: {"model": List[BookModel]}})
 def advanced_search(params: AdvancedSearchParams):
     """Birden çok filtreli gelişmiş arama."""
     books = library.list_books()
     
-    # Başlığa göre filtrele
-    if params.title:
-        books = [b for b in books if params.title.lower() in b.title.lower()]
-    
-    # Yazara göre filtrele
-    if params.author:
-        books = [b for b in books if params.author.lower() in b.author.lower()]
-    
-    # ISBN'e göre filtrele
-    if params.isbn:
-        books = [b for b in books if params.isbn in b.isbn]
+    # Başlık, yazar ve ISBN filtrelerini tek geçişte uygula; sorgu terimleri bir kez küçük harfe çevrilir
+    title_q = params.title.lower() if params.title else None
+    author_q = params.author.lower() if params.author else None
+    isbn_q = params.isbn or None
+    if title_q or author_q or isbn_q:
+        books = [
+            b for b in books
+            if (title_q is None or title_q in b.title.lower())
+            and (author_q is None or author_q in b.author.lower())
+            and (isbn_q is None or isbn_q in b.isbn)
+        ]
     
-    return [BookModel(**b.to_dict()) for b in books]
+    return _book_list_response(books)
 
 
 
@@ -800,15 +1108,16 @@ def get_random_book():
         raise HTTPException(status_code=404, detail="Kütüphanede kitap yok.")
     
     random_book = random.choice(books)
-    return BookModel(**random_book.to_dict())
+    return BookModel.model_construct(**random_book.to_dict())
 
-@app.get("/books/{isbn}", response_model=BookModel)
+@app.get("/books/{isbn}", response_model=None, responses={200: {"model": BookModel}})
 def get_book(isbn: str):
     """ISBN'sine göre tek bir kitap al."""
     book = library.find_book(isbn)
     if not book:
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
-    return BookModel(**book.to_dict())
+    # BookModel şeklinde düz sözlük; yanıt modeli doğrulaması gerekmez
+    return {"title": book.title, "author": book.author, "isbn": book.isbn, "cover_url": book.cover_url}
 
 @app.post("/books", response_model=EnhancedBookModel, dependencies=[Depends(get_api_key)])
 async def add_book(payload: BookCreateModel):
@@ -819,46 +1128,35 @@ async def add_book(payload: BookCreateModel):
             # Birden çok API ile geliştirilmiş kitap eklemeyi kullan
             book = await library.add_book_by_isbn_enhanced(payload.isbn)
             # Bu ISBN ile ilgili önbellekleri geçersiz kıl
-            invalidate_cache(f"enhanced:{payload.isbn}")
-            invalidate_cache(f"ai_summary:{payload.isbn}")
-            # Kitap listesi önbelleklerini de geçersiz kıl
-            invalidate_cache("books:")
+            invalidate_cache_keys((f"enhanced:{payload.isbn}", f"ai_summary:{payload.isbn}"))
+            invalidate_cache("stats:")
             return EnhancedBookModel(**book.to_dict())
         except ValueError as e:
             # Bu, "zaten var" hatasını doğru bir şekilde yakalar
             raise HTTPException(status_code=400, detail=str(e))
         except LookupError:
             # Yedek: tüm API'ler başarısız olduğunda minimal bir kitap girişi oluştur
-            cover_url = f"http://{settings.api_host}:{settings.api_port}/covers/{payload.isbn}"
+            cover_url = COVERS_BASE + payload.isbn
             fallback_book = Book(title="Bilinmeyen Başlık", author="Bilinmeyen Yazar", isbn=payload.isbn, cover_url=cover_url)
             try:
-                library.add_book(fallback_book)
-                # Bu ISBN ile ilgili önbellekleri geçersiz kıl
-                invalidate_cache(f"enhanced:{payload.isbn}")
-                invalidate_cache(f"ai_summary:{payload.isbn}")
-                # Kitap listesi önbelleklerini de geçersiz kıl
-                invalidate_cache("books:")
-                return EnhancedBookModel(**fallback_book.to_dict())
-            except ValueError:
-                # Zaten varsa, mevcut kaydı döndür
-                existing = library.find_book(payload.isbn)
-                if existing:
-                    # Bu ISBN ile ilgili önbellekleri geçersiz kıl (hiç olmasa bile güvenli)
-                    invalidate_cache(f"enhanced:{payload.isbn}")
-                    invalidate_cache(f"ai_summary:{payload.isbn}")
-                    return EnhancedBookModel(**existing.to_dict())
-                raise HTTPException(status_code=400, detail=f"ISBN'i {payload.isbn} olan kitap zaten var.")
+                # Zaten varsa mevcut kayıt döndürülür
+                stored, created = library.add_or_get_book(fallback_book)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            # Bu ISBN ile ilgili önbellekleri geçersiz kıl (hiç olmasa bile güvenli)
+            invalidate_cache_keys((f"enhanced:{payload.isbn}", f"ai_summary:{payload.isbn}"))
+            if created:
+                invalidate_cache("stats:")
+            return EnhancedBookModel(**stored.to_dict())
     # Tüm ayrıntılar sağlanırsa, kitabı doğrudan ekle
     elif payload.isbn and payload.title and payload.author:
-        cover_url = f"http://{settings.api_host}:{settings.api_port}/covers/{payload.isbn}"
+        cover_url = COVERS_BASE + payload.isbn
         book = Book(title=payload.title, author=payload.author, isbn=payload.isbn, cover_url=cover_url)
         try:
             library.add_book(book)
             # Bu ISBN ile ilgili önbellekleri geçersiz kıl
-            invalidate_cache(f"enhanced:{payload.isbn}")
-            invalidate_cache(f"ai_summary:{payload.isbn}")
-            # Kitap listesi önbelleklerini de geçersiz kıl
-            invalidate_cache("books:")
+            invalidate_cache_keys((f"enhanced:{payload.isbn}", f"ai_summary:{payload.isbn}"))
+            invalidate_cache("stats:")
             return EnhancedBookModel(**book.to_dict())
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -874,24 +1172,24 @@ def add_book_legacy(payload: BookCreateModel):
     if payload.isbn and not payload.title:
         try:
             book = library.add_book_by_isbn(payload.isbn)
+            invalidate_cache("stats:")
             return BookModel(**book.to_dict())
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         except (ExternalServiceError, LookupError):
             # Yedek: harici arama başarısız olduğunda minimal bir kitap girişi oluştur.
-            cover_url = f"http://{settings.api_host}:{settings.api_port}/covers/{payload.isbn}"
+            cover_url = COVERS_BASE + payload.isbn
             fallback_book = Book(title="Bilinmeyen Başlık", author="Bilinmeyen Yazar", isbn=payload.isbn, cover_url=cover_url)
             try:
-                library.add_book(fallback_book)
-                return BookModel(**fallback_book.to_dict())
-            except ValueError:
-                existing = library.find_book(payload.isbn)
-                if existing:
-                    return BookModel(**existing.to_dict())
-                raise HTTPException(status_code=400, detail=f"ISBN'i {payload.isbn} olan kitap zaten var.")
+                stored, created = library.add_or_get_book(fallback_book)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if created:
+                invalidate_cache("stats:")
+            return BookModel(**stored.to_dict())
     # Tüm ayrıntılar sağlanırsa, kitabı doğrudan ekle
     elif payload.isbn and payload.title and payload.author:
-        cover_url = f"http://{settings.api_host}:{settings.api_port}/covers/{payload.isbn}"
+        cover_url = COVERS_BASE + payload.isbn
         book = Book(title=payload.title, author=payload.author, isbn=payload.isbn, cover_url=cover_url)
         return _add_book_to_library(book)
     else:
@@ -903,10 +1201,10 @@ def delete_book(isbn: str):
     if not library.remove_book(isbn):
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     # Bu ISBN ile ilgili önbellekleri geçersiz kıl
-    invalidate_cache(f"enhanced:{isbn}")
-    invalidate_cache(f"ai_summary:{isbn}")
-    # Kitap listesi önbelleklerini de geçersiz kıl
-    invalidate_cache("books:")
+    invalidate_cache_keys((f"enhanced:{isbn}", f"enriched:{isbn}", f"ai_summary:{isbn}"))
+    # Kitabın etiket atamaları ON DELETE CASCADE ile silinir
+    cache_manager.bump("book_tags", f"book:{isbn}")
+    invalidate_cache("stats:")
     return {"message": "Kitap kaldırıldı."}
 
 class UpdateBookModel(BaseModel):
@@ -922,10 +1220,8 @@ def update_book(isbn: str, update: UpdateBookModel):
     if not book:
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     # Bu ISBN ile ilgili önbellekleri geçersiz kıl
-    invalidate_cache(f"enhanced:{isbn}")
-    invalidate_cache(f"ai_summary:{isbn}")
-    # Kitap listesi önbelleklerini de geçersiz kıl (sıralama/filtre sonuçları etkilenebilir)
-    invalidate_cache("books:")
+    invalidate_cache_keys((f"enhanced:{isbn}", f"enriched:{isbn}", f"ai_summary:{isbn}"))
+    invalidate_cache("stats:")
     return BookModel(**book.to_dict())
 
 class BookEnrichedModel(BookModel):
@@ -938,86 +1234,98 @@ class BookEnrichedModel(BookModel):
 # (yinelenen model bildirimleri kaldırıldı: EnhancedBookModel, AISummaryRequest, AISummaryResponse,
 #  SentimentAnalysisRequest, SentimentAnalysisResponse, APIUsageStatsResponse)
 
-@app.get("/books/{isbn}/enhanced", response_model=EnhancedBookModel)
-def get_enhanced_book(isbn: str, request: Request, response: Response):
+# enhanced:{isbn} önbellek girdisinin biçim sürümü. Girdideki yük önceden normalleştirilmiştir;
+# biçim değişirse bu sayı artırılır ve eski (ör. Redis'te kalan) girdiler yok sayılıp üzerine yazılır.
+_ENHANCED_CACHE_SCHEMA = 2
+
+def _build_enhanced_payload(isbn: str, version: str, etag: str) -> Dict[str, Any] | None:
+    """Geliştirilmiş kitap yükünü veritabanından oluştur ve ETag'iyle önbelleğe al; kitap yoksa None."""
+    book = library.find_book(isbn)
+    if not book:
+        return None
+    payload = _book_payload(version, book)
+    cache_response(
+        f"enhanced:{isbn}",
+        {"_v": _ENHANCED_CACHE_SCHEMA, "etag": etag, "payload": payload},
+        ttl_seconds=300,
+    )
+    return payload
+
+@app.get("/books/{isbn}/enhanced", response_model=None, responses={200: {"model": EnhancedBookModel}})
+async def get_enhanced_book(isbn: str, request: Request, response: Response):
     """Google Books ve AI verileriyle geliştirilmiş kitap ayrıntılarını al."""
     try:
-        book = library.find_book(isbn)
-        if not book:
-            raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
-
-        # Mevcut kitap sözlüğüne dayalı ETag (TTL boyunca kararlı)
-        book_dict = book.to_dict()
-        etag = _compute_etag_from_dict({"enhanced": True, **book_dict})
+        # Sürüme dayalı ETag: her yazmada değişir, gövde serileştirilmeden ve özetlenmeden hesaplanır.
+        # Sürüm kitap okunmadan önce alınır; arada bir yazma olursa etiket eskir, veri değil.
+        version = await run_in_threadpool(_library_version)
+        etag = f'W/"enhanced-{isbn}-{version}"'
         cache_control = "public, max-age=300"
-        # Koşullu GET işleme
+        # Koşullu GET işleme: eşleşen etiket yalnızca kitap varken verilmiştir ve silme sürümü değiştirir,
+        # bu yüzden 304 kitap okunmadan döndürülebilir
         inm = request.headers.get("if-none-match")
         if inm == etag:
             return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
 
-        # Gövde oluşturma için önbelleği dene (model örnekleri değil, düz sözlükleri sakla)
+        # Gövde oluşturma için önbelleği dene; yük, üretildiği ETag ile birlikte saklanır.
+        # Aynı sürümde önbelleğe alınmış yük kitabın var olduğunu da gösterir, veritabanı okunmaz.
+        # Güncel biçimdeki yük zaten normalleştirilmiştir; isabette yeniden normalleştirilmez.
         cache_key = f"enhanced:{isbn}"
         cached = get_cached_response(cache_key)
-        use_cached = False
-        cached_payload: Dict[str, Any] | None = None
-        if cached is not None:
-            # Geriye dönük uyumluluk: sözlükleri veya önceden önbelleğe alınmış model örneklerini kabul et
-            if isinstance(cached, dict):
-                cached_payload = _normalize_enhanced_payload(cached)
-            else:
-                # Muhtemelen bir Pydantic model örneği; güvenli bir şekilde sözlüğe dönüştür
-                try:
-                    cached_payload = _normalize_enhanced_payload(cached.model_dump())  # Pydantic v2
-                except AttributeError:
-                    try:
-                        cached_payload = _normalize_enhanced_payload(cached.dict())  # Pydantic v1
-                    except Exception:
-                        cached_payload = None
-            # Yalnızca mevcut ETag ile aynı durumu temsil ediyorsa önbelleği kullan
-            if cached_payload is not None:
-                try:
-                    cached_etag = _compute_etag_from_dict({"enhanced": True, **cached_payload})
-                    use_cached = (cached_etag == etag)
-                except Exception:
-                    use_cached = False
-        if use_cached and cached_payload is not None:
-            result_model = EnhancedBookModel(**cached_payload)
+        if isinstance(cached, dict) and cached.get("_v") == _ENHANCED_CACHE_SCHEMA and cached.get("etag") == etag:
+            payload = cached["payload"]
         else:
-            # Daha sonra tür sorunlarını önlemek için yeni model oluştur ve önbelleği sözlük olarak yenile
-            book_dict = book.to_dict()
-            fresh_payload = _normalize_enhanced_payload(book_dict)
-            result_model = EnhancedBookModel(**fresh_payload)
-            cache_response(cache_key, fresh_payload, ttl_seconds=300)
+            # Eşzamanlı ıskalamalar (ör. pano yenilemesi) aynı sürüm için tek bir oluşturma işini paylaşır
+            async def _runner():
+                return await run_in_threadpool(_build_enhanced_payload, isbn, version, etag)
+            payload = await _coalesced(f"{cache_key}:{etag}", _runner)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
 
-        # Normal yanıta başlıkları ayarla
-        response.headers["ETag"] = etag
-        response.headers["Cache-Control"] = cache_control
-        return result_model
+        # Yük kendi normalleştirmemizden geliyor; model doğrulaması ve yeniden serileştirme atlanır
+        return DefaultJSONResponse(content=payload, headers={"ETag": etag, "Cache-Control": cache_control})
     except HTTPException:
         raise  # HTTP istisnalarını yeniden yükselt
     except Exception as e:
-        print(f"Enhanced endpoint error for {isbn}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Enhanced endpoint error for %s", isbn)
         raise HTTPException(status_code=500, detail=f"Sunucu hatası: {str(e)}")
 
-@app.get("/books/{isbn}/enriched", response_model=BookEnrichedModel)
-def get_enriched_book(isbn: str):
+# Open Library zenginleştirme verileri nadiren değişir; ISBN başına 1 saat önbelleğe alınır
+ENRICHED_CACHE_TTL = 3600
+
+@app.get("/books/{isbn}/enriched", response_model=None, responses={200: {"model": BookEnrichedModel}})
+async def get_enriched_book(isbn: str):
     """Open Library'den zenginleştirilmiş kitap ayrıntılarını al (eski uç nokta)."""
-    book = library.find_book(isbn)
+    # SQLite ve Redis çağrıları engelleyicidir; olay döngüsü yerine iş parçacığı havuzunda çalışır
+    book = await run_in_threadpool(library.find_book, isbn)
     if not book:
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     
     try:
-        enriched_data = library.fetch_enriched_details(isbn)
-        book_dict = book.to_dict()
-        book_dict.update(enriched_data)
-        return BookEnrichedModel(**book_dict)
+        cache_key = f"enriched:{isbn}"
+        enriched_data = await run_in_threadpool(get_cached_response, cache_key)
+        if enriched_data is None:
+            # Open Library çağrısı engelleyicidir; olay döngüsünü meşgul etmemek için iş parçacığı havuzunda çalıştır
+            # ve aynı ISBN için eşzamanlı istekleri tek bir harici çağrıda birleştir
+            async def _runner():
+                return await run_in_threadpool(library.fetch_enriched_details, isbn)
+            enriched_data = await _coalesced(cache_key, _runner)
+            # Boş ya da hatalı sonuçlar (geçici Open Library hatası) önbelleğe alınmaz; sonraki istek yeniden dener
+            if enriched_data and "error" not in enriched_data:
+                await run_in_threadpool(cache_response, cache_key, enriched_data, ttl_seconds=ENRICHED_CACHE_TTL)
     except Exception:
         # Zenginleştirme başarısız olursa temel kitap bilgilerini döndür
-        book_dict = book.to_dict()
-        book_dict['cover_url'] = f"http://{settings.api_host}:{settings.api_port}/covers/{isbn}"
-        return BookEnrichedModel(**book_dict)
+        enriched_data = {}
+    # Alanlar zaten doğrulanmış kaynaklardan geliyor; ara sözlük ve yeniden doğrulama atlanır
+    return BookEnrichedModel.model_construct(
+        title=book.title,
+        author=book.author,
+        isbn=book.isbn,
+        cover_url=enriched_data.get("cover_url") or book.cover_url or COVERS_BASE + isbn,
+        publish_year=enriched_data.get("publish_year"),
+        publishers=enriched_data.get("publishers"),
+        subjects=enriched_data.get("subjects"),
+        description=enriched_data.get("description"),
+    )
 
 # --- AI Destekli Uç Noktalar ---
 @app.get("/books/{isbn}/ai-summary", response_model=AISummaryResponse)
@@ -1027,45 +1335,67 @@ async def get_ai_summary(isbn: str, request: Request, response: Response):
     if not book:
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
 
-    # Önce önbelleği dene
+    cache_control = "public, max-age=600"
+    inm = request.headers.get("if-none-match")
+
+    # Kayıtlı özet varsa yanıt doğrudan kitaptan üretilir; koşullu istekler model kurulmadan yanıtlanır
+    if book.ai_summary:
+        etag = _ai_summary_etag(isbn, book.ai_summary_generated_at)
+        if inm == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+        # Alanlar veritabanından geliyor ve türleri belli; doğrulama atlanır
+        result = AISummaryResponse.model_construct(
+            isbn=isbn,
+            summary=book.ai_summary,
+            generated_at=book.ai_summary_generated_at or "unknown",
+            summary_length=len(book.ai_summary),
+            original_length=len(book.description) if book.description else None
+        )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Last-Modified"] = result.generated_at
+        return result
+
+    # Kayıtlı özet yoksa (ör. veritabanına yazılamadıysa) önbelleği dene
     cache_key = f"ai_summary:{isbn}"
     cached = get_cached_response(cache_key)
     if cached is not None:
-        # ETag'ı hesaplamadan önce önbelleğe alınmış yükü normalleştir (sözlük veya Pydantic modeli olabilir)
+        # Kendi yazdığımız girdiler zaten AISummaryResponse örneğidir ve olduğu gibi kullanılır;
+        # sözlük veya farklı model biçimindeki eski girdiler doğrulanarak yeniden kurulur
+        result: AISummaryResponse | None = cached if isinstance(cached, AISummaryResponse) else None
         cached_payload: Dict[str, Any] | None = None
-        if isinstance(cached, dict):
-            cached_payload = dict(cached)
-        else:
-            try:
-                cached_payload = cached.model_dump()
-            except AttributeError:
+        if result is None:
+            if isinstance(cached, dict):
+                cached_payload = dict(cached)
+            else:
                 try:
-                    cached_payload = cached.dict()
-                except Exception:
-                    cached_payload = None
-        if cached_payload is None:
+                    cached_payload = cached.model_dump()
+                except AttributeError:
+                    try:
+                        cached_payload = cached.dict()
+                    except Exception:
+                        cached_payload = None
+        if result is None and cached_payload is None:
             # Kullanılamaz önbellek girişi; geçersiz kıl ve yeni yola devam et
             invalidate_cache(cache_key)
         else:
-            # Yükten yanıt modelini güvenli bir şekilde oluştur
-            try:
-                result = AISummaryResponse(**cached_payload)
-            except Exception:
-                # Önbelleğe alınmış yük isteğe bağlı alanları kaçırırsa minimal yeniden yapılandırma
-                summary_text = str(cached_payload.get("summary", ""))
-                result = AISummaryResponse(
-                    isbn=str(cached_payload.get("isbn", isbn)),
-                    summary=summary_text,
-                    generated_at=str(cached_payload.get("generated_at", datetime.now().isoformat())),
-                    summary_length=int(cached_payload.get("summary_length", len(summary_text))),
-                    original_length=cached_payload.get("original_length"),
-                    source=str(cached_payload.get("source", "hugging_face")),
-                )
+            if result is None:
+                # Yükten yanıt modelini güvenli bir şekilde oluştur
+                try:
+                    result = AISummaryResponse(**cached_payload)
+                except Exception:
+                    # Önbelleğe alınmış yük isteğe bağlı alanları kaçırırsa minimal yeniden yapılandırma
+                    summary_text = str(cached_payload.get("summary", ""))
+                    result = AISummaryResponse(
+                        isbn=str(cached_payload.get("isbn", isbn)),
+                        summary=summary_text,
+                        generated_at=str(cached_payload.get("generated_at", _iso_now_sec())),
+                        summary_length=int(cached_payload.get("summary_length", len(summary_text))),
+                        original_length=cached_payload.get("original_length"),
+                        source=str(cached_payload.get("source", "hugging_face")),
+                    )
             # Önbelleğe alınmış sonuç için ETag/Cache-Control başlıkları
-            data_for_etag = {"isbn": result.isbn, "summary": result.summary, "generated_at": result.generated_at}
-            etag = _compute_etag_from_dict(data_for_etag)
-            cache_control = "public, max-age=600"
-            inm = request.headers.get("if-none-match")
+            etag = _ai_summary_etag(isbn, result.generated_at)
             if inm == etag:
                 return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
             response.headers["ETag"] = etag
@@ -1073,29 +1403,6 @@ async def get_ai_summary(isbn: str, request: Request, response: Response):
             response.headers["Last-Modified"] = result.generated_at
             return result
 
-    # AI özetinin zaten var olup olmadığını kontrol et
-    if hasattr(book, 'ai_summary') and book.ai_summary:
-        result = AISummaryResponse(
-            isbn=isbn,
-            summary=book.ai_summary,
-            generated_at=book.ai_summary_generated_at or "unknown",
-            summary_length=len(book.ai_summary),
-            original_length=len(book.description) if book.description else None
-        )
-        # 10 dakika önbelleğe al
-        cache_response(cache_key, result, ttl_seconds=600)
-        # ETag/Önbellek başlıkları
-        data_for_etag = {"isbn": isbn, "summary": result.summary, "generated_at": result.generated_at}
-        etag = _compute_etag_from_dict(data_for_etag)
-        cache_control = "public, max-age=600"
-        inm = request.headers.get("if-none-match")
-        if inm == etag:
-            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
-        response.headers["ETag"] = etag
-        response.headers["Cache-Control"] = cache_control
-        response.headers["Last-Modified"] = result.generated_at
-        return result
-
     # Yeni AI özeti oluştur
     try:
         async def _runner():
@@ -1105,7 +1412,7 @@ async def get_ai_summary(isbn: str, request: Request, response: Response):
             result = AISummaryResponse(
                 isbn=isbn,
                 summary=summary,
-                generated_at=datetime.now().isoformat(),
+                generated_at=_iso_now_sec(),
                 summary_length=len(summary),
                 original_length=len(book.description) if book.description else None
             )
@@ -1114,10 +1421,7 @@ async def get_ai_summary(isbn: str, request: Request, response: Response):
             # Geliştirilmiş yük AI özetini içerir; yenilendiğinden emin ol
             invalidate_cache(f"enhanced:{isbn}")
             # ETag/Önbellek başlıkları
-            data_for_etag = {"isbn": isbn, "summary": result.summary, "generated_at": result.generated_at}
-            etag = _compute_etag_from_dict(data_for_etag)
-            cache_control = "public, max-age=600"
-            inm = request.headers.get("if-none-match")
+            etag = _ai_summary_etag(isbn, result.generated_at)
             if inm == etag:
                 return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
             response.headers["ETag"] = etag
@@ -1137,7 +1441,7 @@ async def generate_ai_summary(isbn: str, request: AISummaryRequest, response: Re
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     
     # Yeniden oluşturmayı zorlamamız gerekip gerekmediğini kontrol et
-    if not request.force_regenerate and hasattr(book, 'ai_summary') and book.ai_summary:
+    if not request.force_regenerate and book.ai_summary:
         result = AISummaryResponse(
             isbn=isbn,
             summary=book.ai_summary,
@@ -1146,8 +1450,7 @@ async def generate_ai_summary(isbn: str, request: AISummaryRequest, response: Re
             original_length=len(book.description) if book.description else None
         )
         # Önbellekleme başlıklarını da ekle (POST yanıtında bile)
-        data_for_etag = {"isbn": isbn, "summary": result.summary, "generated_at": result.generated_at}
-        response.headers["ETag"] = _compute_etag_from_dict(data_for_etag)
+        response.headers["ETag"] = _ai_summary_etag(isbn, result.generated_at)
         response.headers["Cache-Control"] = "public, max-age=600"
         response.headers["Last-Modified"] = result.generated_at
         return result
@@ -1163,7 +1466,7 @@ async def generate_ai_summary(isbn: str, request: AISummaryRequest, response: Re
             result = AISummaryResponse(
                 isbn=isbn,
                 summary=summary,
-                generated_at=datetime.now().isoformat(),
+                generated_at=_iso_now_sec(),
                 summary_length=len(summary),
                 original_length=len(book.description) if book.description else None
             )
@@ -1171,8 +1474,7 @@ async def generate_ai_summary(isbn: str, request: AISummaryRequest, response: Re
             cache_response(f"ai_summary:{isbn}", result, ttl_seconds=600)
             # Geliştirilmiş yük AI özetini içerir; yenilendiğinden emin ol
             invalidate_cache(f"enhanced:{isbn}")
-            data_for_etag = {"isbn": isbn, "summary": result.summary, "generated_at": result.generated_at}
-            response.headers["ETag"] = _compute_etag_from_dict(data_for_etag)
+            response.headers["ETag"] = _ai_summary_etag(isbn, result.generated_at)
             response.headers["Cache-Control"] = "public, max-age=600"
             response.headers["Last-Modified"] = result.generated_at
             return result
@@ -1195,14 +1497,14 @@ async def analyze_sentiment(isbn: str, request: SentimentAnalysisRequest):
                 text=request.text,
                 label=sentiment['label'],
                 score=sentiment['score'],
-                analysis_time=datetime.now().isoformat()
+                analysis_time=_iso_now_sec()
             )
         else:
             raise HTTPException(status_code=503, detail="Duygu analizi hizmeti kullanılamıyor")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Duygu analizi yapılamadı: {str(e)}")
 
-@app.get("/books/{isbn}/similar", response_model=List[EnhancedBookModel])
+@app.get("/books/{isbn}/similar", response_model=None, responses={200: {"model": List[EnhancedBookModel]}})
 async def get_similar_books(isbn: str, limit: int = Query(5, ge=1, le=20)):
     """Google Books API'sini kullanarak benzer kitapları al."""
     book = library.find_book(isbn)
@@ -1212,23 +1514,23 @@ async def get_similar_books(isbn: str, limit: int = Query(5, ge=1, le=20)):
     if not library.google_books or not library.google_books.is_available():
         raise HTTPException(status_code=503, detail="Google Books hizmeti kullanılamıyor")
     
-    try:
-        similar_books = await library.google_books.get_similar_books(isbn, limit)
-        
+    def _to_payloads(similar_books) -> List[Dict[str, Any]]:
         # Kitap formatımıza dönüştür ve kütüphanede olup olmadıklarını kontrol et
+        version = library.version
         result = []
         for gb_book in similar_books:
             # Kitabın kütüphanemizde olup olmadığını kontrol et
             existing_book = library.find_book(gb_book.isbn)
             if existing_book:
-                result.append(EnhancedBookModel(**existing_book.to_dict()))
+                result.append(_book_payload(version, existing_book))
             else:
-                # Görüntüleme için geçici bir kitap nesnesi oluştur
-                temp_book_dict = {
+                # Görüntüleme için geçici bir kitap yükü oluştur (EnhancedBookModel alanlarının tamamı)
+                result.append({
                     "isbn": gb_book.isbn,
                     "title": gb_book.title,
                     "author": ", ".join(gb_book.authors) if gb_book.authors else "Bilinmeyen Yazar",
                     "cover_url": gb_book.thumbnail_url,
+                    "created_at": None,
                     "page_count": gb_book.page_count,
                     "categories": gb_book.categories,
                     "published_date": gb_book.published_date,
@@ -1237,11 +1539,23 @@ async def get_similar_books(isbn: str, limit: int = Query(5, ge=1, le=20)):
                     "description": gb_book.description,
                     "google_rating": gb_book.average_rating,
                     "google_rating_count": gb_book.ratings_count,
+                    "ai_summary": None,
+                    "ai_summary_generated_at": None,
+                    "sentiment_score": None,
                     "data_sources": ["google_books"]
-                }
-                result.append(EnhancedBookModel(**temp_book_dict))
-        
+                })
         return result
+
+    async def _runner():
+        similar_books = await library.google_books.get_similar_books(isbn, limit)
+        # Kütüphane aramaları engelleyicidir; olay döngüsü yerine iş parçacığı havuzunda yapılır
+        return await run_in_threadpool(_to_payloads, similar_books)
+
+    try:
+        # Aynı (ISBN, limit) için eşzamanlı istekler tek bir Google Books çağrısını paylaşır
+        payloads = await _coalesced(f"similar:{isbn}:{limit}", _runner)
+        # Yükler zaten EnhancedBookModel biçiminde; satır başına model doğrulaması yapılmaz
+        return DefaultJSONResponse(content=payloads)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Benzer kitaplar alınamadı: {str(e)}")
 
@@ -1259,35 +1573,41 @@ def get_api_usage_stats():
 @app.get("/export/json")
 def export_books_json():
     """Tüm kitapları JSON olarak dışa aktar."""
-    books = library.list_books()
-    data = [b.to_dict() for b in books]
-    return JSONResponse(
+    # Kitaplar imleçten tek tek okunur; ara Book listesi tutulmaz. Gövde orjson ile kodlanır.
+    data = [b.to_dict() for b in library.iter_books()]
+    return DefaultJSONResponse(
         content=data,
         headers={
             "Content-Disposition": f"attachment; filename=library_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         }
     )
 
+# CSV dışa aktarımı bu boyuta ulaşan parçalar halinde gönderilir (satır başına ayrı parça göndermekten ucuzdur)
+_CSV_CHUNK_SIZE = 64 * 1024
+
 @app.get("/export/csv")
 def export_books_csv():
-    """Tüm kitapları CSV olarak dışa aktar."""
+    """Tüm kitapları CSV olarak dışa aktar.
+
+    Satırlar veritabanı imlecinden okunurken akıtılır; tüm kütüphane bellekte tamponlanmaz.
+    """
     import csv
     import io
-    
-    books = library.list_books()
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=['isbn', 'title', 'author'])
-    writer.writeheader()
-    
-    for book in books:
-        writer.writerow({
-            'isbn': book.isbn,
-            'title': book.title,
-            'author': book.author
-        })
-    
-    return Response(
-        content=output.getvalue(),
+
+    def _rows():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['isbn', 'title', 'author'])
+        for book in library.iter_books():
+            writer.writerow([book.isbn, book.title, book.author])
+            if output.tell() >= _CSV_CHUNK_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+
+    return StreamingResponse(
+        _rows(),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=library_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -1299,27 +1619,27 @@ async def import_books_json(request: Request):
     """JSON'dan kitapları içe aktar."""
     try:
         data = await request.json()
-        imported_count = 0
-        errors = []
-        
+        books = []
         for item in data:
-            try:
-                if all(k in item for k in ['isbn', 'title', 'author']):
-                    # İçe aktarma sırasında cover_url'yi kontrol et, yoksa None olarak bırak
-                    cover_url = item.get('cover_url')
-                    if not cover_url:
-                        cover_url = None  # Cover URL'yi zorla oluşturma
-                    
-                    book = Book(
-                        title=item['title'],
-                        author=item['author'],
-                        isbn=item['isbn'],
-                        cover_url=cover_url
-                    )
-                    library.add_book(book)
-                    imported_count += 1
-            except ValueError as e:
-                errors.append(f"ISBN {item.get('isbn', 'unknown')}: {str(e)}")
+            if all(k in item for k in ['isbn', 'title', 'author']):
+                # İçe aktarma sırasında cover_url'yi kontrol et, yoksa None olarak bırak
+                cover_url = item.get('cover_url')
+                if not cover_url:
+                    cover_url = None  # Cover URL'yi zorla oluşturma
+                
+                books.append(Book(
+                    title=item['title'],
+                    author=item['author'],
+                    isbn=item['isbn'],
+                    cover_url=cover_url
+                ))
+
+        # Tüm kitaplar tek işlemde eklenir (kitap başına ayrı commit/fsync yok); veritabanı işi iş parçacığı havuzunda
+        imported_count, skipped = await run_in_threadpool(library.add_books_bulk, books)
+        errors = [f"ISBN {isbn}: {library.duplicate_isbn_message(isbn)}" for isbn in skipped]
+        
+        if imported_count:
+            invalidate_cache("stats:")
         
         return {
             "imported": imported_count,
@@ -1339,43 +1659,27 @@ class ExtendedStatsModel(BaseModel):
     total_favorites: int = 0
     total_reading_list: int = 0
 
-@app.get("/stats/extended", response_model=ExtendedStatsModel)
+@app.get("/stats/extended", response_model=None, responses={200: {"model": ExtendedStatsModel}})
 def get_extended_stats():
     """Kütüphane hakkında genişletilmiş istatistikleri al."""
-    books = library.list_books()
+    # Toplama SQL'de yapılır; yanıt maliyeti kütüphane boyutuyla değil sonuç boyutuyla ölçeklenir
     stats = library.get_statistics()
-    
-    # Yazara göre kitapları say
-    author_counts: Dict[str, int] = {}
-    for book in books:
-        author_counts[book.author] = author_counts.get(book.author, 0) + 1
-    
-    # En yaygın yazarı bul
-    most_common_author = None
-    if author_counts:
-        # dict.get aşırı yüklemeleriyle ilgili yazım sorunlarını önlemek için açık lambda kullan
-        most_common_author = max(author_counts, key=lambda k: author_counts[k])
-    
-    # Son eklenenleri al (son 5)
-    recent_books = books[-5:] if len(books) > 0 else []
-    
-    return ExtendedStatsModel(
-        total_books=stats["total_books"],
-        unique_authors=stats["unique_authors"],
-        most_common_author=most_common_author,
-        books_by_author=dict(sorted(author_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
-        recent_additions=[BookModel(**b.to_dict()) for b in recent_books]
-    )
-
-# --- Sağlık Kontrolü ---
-@app.get("/health")
-def health_check():
-    """Sağlık kontrolü uç noktası."""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "total_books": len(library.list_books())
-    }
+    top_authors = library.get_author_histogram(limit=10)
+    recent_books = library.recent_books(limit=5)
+
+    # Yük burada ExtendedStatsModel şemasına göre kurulur; ikinci bir yanıt doğrulaması yapılmaz
+    return DefaultJSONResponse(content={
+        "total_books": stats["total_books"],
+        "unique_authors": stats["unique_authors"],
+        "most_common_author": top_authors[0][0] if top_authors else None,
+        "books_by_author": dict(top_authors),
+        "recent_additions": [
+            {"title": b.title, "author": b.author, "isbn": b.isbn, "cover_url": b.cover_url}
+            for b in recent_books
+        ],
+        "total_favorites": 0,
+        "total_reading_list": 0,
+    })
 
 @app.post("/test-post")
 def test_post():
@@ -1395,10 +1699,9 @@ class ReviewCreateModel(BaseModel):
     rating: int = Field(ge=1, le=5)
     comment: Optional[str] = None
 
-@app.get("/books/{isbn}/reviews", response_model=List[ReviewModel])
-def get_book_reviews(isbn: str):
+@app.get("/books/{isbn}/reviews", response_model=None, responses={200: {"model": List[ReviewModel]}})
+def get_book_reviews(isbn: str, conn: sqlite3.Connection = Depends(get_read_db)):
     """Belirli bir kitap için tüm incelemeleri al."""
-    conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -1408,35 +1711,28 @@ def get_book_reviews(isbn: str):
         ORDER BY created_at DESC
     """, (isbn,))
     
-    reviews = cursor.fetchall()
-    conn.close()
-    
-    return [
-        ReviewModel(
-            id=r['id'],
-            isbn=r['isbn'],
-            user_name=r['user_name'],
-            rating=r['rating'],
-            comment=r['comment'],
-            created_at=r['created_at']
-        ) for r in reviews
-    ]
+    # Satırlar şemayla birebir uyumlu; model doğrulaması atlanıp doğrudan orjson ile kodlanır
+    return DefaultJSONResponse(content=[dict(r) for r in cursor])
 
 @app.post("/books/{isbn}/reviews", response_model=ReviewModel)
-def add_book_review(isbn: str, review: ReviewCreateModel):
+def add_book_review(isbn: str, review: ReviewCreateModel, conn: sqlite3.Connection = Depends(get_db)):
     """Belirli bir kitap için bir inceleme ekle."""
     # Kitabın var olup olmadığını kontrol et
     book = library.find_book(isbn)
     if not book:
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        INSERT INTO reviews (isbn, user_name, rating, comment)
-        VALUES (?, ?, ?, ?)
-    """, (isbn, review.user_name, review.rating, review.comment))
+    try:
+        cursor.execute("""
+            INSERT INTO reviews (isbn, user_name, rating, comment)
+            VALUES (?, ?, ?, ?)
+        """, (isbn, review.user_name, review.rating, review.comment))
+    except sqlite3.IntegrityError:
+        # foreign_keys açık: kitap denetimden sonra silinmişse ekleme yabancı anahtar hatasıyla reddedilir
+        conn.rollback()
+        raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     
     review_id = cursor.lastrowid
     conn.commit()
@@ -1449,7 +1745,6 @@ def add_book_review(isbn: str, review: ReviewCreateModel):
     """, (review_id,))
     
     new_review = cursor.fetchone()
-    conn.close()
     
     return ReviewModel(
         id=new_review['id'],
@@ -1461,9 +1756,8 @@ def add_book_review(isbn: str, review: ReviewCreateModel):
     )
 
 @app.get("/books/{isbn}/rating")
-def get_book_rating(isbn: str):
+def get_book_rating(isbn: str, conn: sqlite3.Connection = Depends(get_read_db)):
     """Bir kitap için ortalama puanı ve inceleme sayısını al."""
-    conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -1473,7 +1767,6 @@ def get_book_rating(isbn: str):
     """, (isbn,))
     
     result = cursor.fetchone()
-    conn.close()
     
     return {
         "isbn": isbn,
@@ -1492,10 +1785,18 @@ class TagCreateModel(BaseModel):
     name: str
     color: str = '#3B82F6'
 
-@app.get("/tags", response_model=List[TagModel])
-def get_all_tags():
+# Etiket listeleri yazmalarda etiket sürümüyle geçersiz kılındığından TTL yalnızca üst sınırdır
+TAGS_CACHE_TTL = 3600
+
+@app.get("/tags", response_model=None, responses={200: {"model": List[TagModel]}})
+def get_all_tags(conn: sqlite3.Connection = Depends(get_read_db)):
     """Kitap sayılarıyla birlikte mevcut tüm etiketleri al."""
-    conn = get_db_connection()
+    # Liste yalnızca etiket ya da kitap-etiket yazmalarında değişir; o zamana kadar önbellekten sunulur
+    cached = cache_manager.get_tagged("tags:all")
+    if cached is not None:
+        return DefaultJSONResponse(content=cached)
+    versions = cache_manager.tag_versions(("tags", "book_tags"))
+    
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -1506,22 +1807,14 @@ def get_all_tags():
         ORDER BY t.name
     """)
     
-    tags = cursor.fetchall()
-    conn.close()
-    
-    return [
-        TagModel(
-            id=t['id'],
-            name=t['name'],
-            color=t['color'],
-            book_count=t['book_count']
-        ) for t in tags
-    ]
+    # Satırlar ara bir fetchall() listesi kurulmadan imleçten doğrudan okunur
+    tags = [dict(t) for t in cursor]
+    cache_manager.set_tagged("tags:all", tags, versions, ttl_seconds=TAGS_CACHE_TTL)
+    return DefaultJSONResponse(content=tags)
 
 @app.post("/tags", response_model=TagModel)
-def create_tag(tag: TagCreateModel):
+def create_tag(tag: TagCreateModel, conn: sqlite3.Connection = Depends(get_db)):
     """Yeni bir etiket oluştur."""
-    conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
@@ -1532,74 +1825,144 @@ def create_tag(tag: TagCreateModel):
         
         tag_id = cursor.lastrowid
         conn.commit()
-        conn.close()
+        cache_manager.bump("tags")
         
         return TagModel(id=tag_id, name=tag.name, color=tag.color, book_count=0)
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="Etiket zaten var.")
 
-@app.get("/books/{isbn}/tags", response_model=List[TagModel])
-def get_book_tags(isbn: str):
-    """Belirli bir kitap için tüm etiketleri al."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _book_tags(conn: sqlite3.Connection, isbn: str) -> List[Dict[str, Any]]:
+    """Kitabın etiketlerini döndür; liste etiket sürümleriyle önbelleğe alınır ve etiket yazmalarında geçersiz olur."""
+    cache_key = f"tags:book:{isbn}"
+    cached = cache_manager.get_tagged(cache_key)
+    if cached is not None:
+        return cached
+    versions = cache_manager.tag_versions(("tags", f"book:{isbn}"))
     
-    cursor.execute("""
-        SELECT t.id, t.name, t.color
+    cursor = conn.execute("""
+        SELECT t.id, t.name, t.color, 0 AS book_count
         FROM tags t
         JOIN book_tags bt ON t.id = bt.tag_id
         WHERE bt.isbn = ?
         ORDER BY t.name
     """, (isbn,))
     
-    tags = cursor.fetchall()
-    conn.close()
-    
-    return [
-        TagModel(id=t['id'], name=t['name'], color=t['color'])
-        for t in tags
-    ]
+    tags = [dict(t) for t in cursor]
+    cache_manager.set_tagged(cache_key, tags, versions, ttl_seconds=TAGS_CACHE_TTL)
+    return tags
+
+@app.get("/books/{isbn}/tags", response_model=None, responses={200: {"model": List[TagModel]}})
+def get_book_tags(isbn: str, conn: sqlite3.Connection = Depends(get_read_db)):
+    """Belirli bir kitap için tüm etiketleri al."""
+    return DefaultJSONResponse(content=_book_tags(conn, isbn))
+
+class BookRatingModel(BaseModel):
+    isbn: str
+    average_rating: float = 0
+    review_count: int = 0
+
+class BookDetailBundleModel(BaseModel):
+    reviews: List[ReviewModel]
+    rating: BookRatingModel
+    tags: List[TagModel]
+
+@app.get("/books/{isbn}/detail-bundle", response_model=None, responses={200: {"model": BookDetailBundleModel}})
+def get_book_detail_bundle(isbn: str, conn: sqlite3.Connection = Depends(get_read_db)):
+    """Detay penceresi için incelemeleri, puan özetini ve etiketleri tek bağlantıda birlikte al.
+
+    /reviews, /rating ve /tags uç noktalarıyla aynı verileri döndürür; üç ayrı istek yerine tek gidiş-dönüş yeterlidir.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, isbn, user_name, rating, comment, created_at 
+        FROM reviews 
+        WHERE isbn = ?
+        ORDER BY created_at DESC
+    """, (isbn,))
+    reviews = [dict(r) for r in cursor]
+
+    tags = _book_tags(conn, isbn)
+
+    # Puan özeti zaten okunan incelemelerden hesaplanır; ayrı bir AVG/COUNT sorgusu gerekmez
+    review_count = len(reviews)
+    average_rating = sum(r["rating"] for r in reviews) / review_count if review_count else 0
+    return {
+        "reviews": reviews,
+        "rating": {"isbn": isbn, "average_rating": average_rating, "review_count": review_count},
+        "tags": tags,
+    }
 
 @app.post("/books/{isbn}/tags")
-def add_tag_to_book(isbn: str, tag_id: int = Body(...)):
+def add_tag_to_book(isbn: str, tag_id: int = Body(...), conn: sqlite3.Connection = Depends(get_db)):
     """Bir kitaba etiket ekle."""
     # Kitabın var olup olmadığını kontrol et
     book = library.find_book(isbn)
     if not book:
         raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("""
-            INSERT INTO book_tags (isbn, tag_id)
-            VALUES (?, ?)
-        """, (isbn, tag_id))
-        
-        conn.commit()
-        conn.close()
+        with write_transaction(conn):
+            conn.execute("""
+                INSERT INTO book_tags (isbn, tag_id)
+                VALUES (?, ?)
+            """, (isbn, tag_id))
+        cache_manager.bump("book_tags", f"book:{isbn}")
         
         return {"message": "Etiket başarıyla eklendi"}
-    except sqlite3.IntegrityError:
-        conn.close()
+    except sqlite3.IntegrityError as e:
+        # foreign_keys açık: var olmayan etiket (ya da denetimden sonra silinen kitap) yinelenen atamadan
+        # ayrı raporlanır
+        if "FOREIGN KEY" in str(e):
+            if conn.execute("SELECT 1 FROM tags WHERE id = ?", (tag_id,)).fetchone() is None:
+                raise HTTPException(status_code=404, detail="Etiket bulunamadı.")
+            raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
         raise HTTPException(status_code=400, detail="Etiket zaten bu kitaba atanmış.")
 
+@app.post("/books/{isbn}/tags/bulk")
+def add_tags_to_book(isbn: str, tag_ids: List[int] = Body(...), conn: sqlite3.Connection = Depends(get_db)):
+    """Bir kitaba birden çok etiketi tek işlemde ekle."""
+    book = library.find_book(isbn)
+    if not book:
+        raise HTTPException(status_code=404, detail="Kitap bulunamadı.")
+
+    requested = list(dict.fromkeys(tag_ids))
+    if not requested:
+        return {"message": "Eklenecek etiket yok", "added": [], "already_assigned": [], "not_found": []}
+
+    with write_transaction(conn):
+        placeholders = ",".join("?" * len(requested))
+        existing = {row[0] for row in conn.execute(
+            f"SELECT id FROM tags WHERE id IN ({placeholders})", requested
+        )}
+        assigned = {row[0] for row in conn.execute(
+            "SELECT tag_id FROM book_tags WHERE isbn = ?", (isbn,)
+        )}
+        # Yabancı anahtar hatası OR IGNORE ile yutulmaz; var olmayan etiketler önceden ayıklanır
+        to_add = [t for t in requested if t in existing and t not in assigned]
+        conn.executemany(
+            "INSERT OR IGNORE INTO book_tags (isbn, tag_id) VALUES (?, ?)",
+            [(isbn, t) for t in to_add],
+        )
+    if to_add:
+        cache_manager.bump("book_tags", f"book:{isbn}")
+
+    return {
+        "message": f"{len(to_add)} etiket eklendi",
+        "added": to_add,
+        "already_assigned": [t for t in requested if t in assigned],
+        "not_found": [t for t in requested if t not in existing],
+    }
+
 @app.delete("/books/{isbn}/tags/{tag_id}")
-def remove_tag_from_book(isbn: str, tag_id: int):
+def remove_tag_from_book(isbn: str, tag_id: int, conn: sqlite3.Connection = Depends(get_db)):
     """Bir kitaptan etiketi kaldır."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        DELETE FROM book_tags
-        WHERE isbn = ? AND tag_id = ?
-    """, (isbn, tag_id))
-    
-    affected = cursor.rowcount
-    conn.commit()
-    conn.close()
+    with write_transaction(conn):
+        affected = conn.execute("""
+            DELETE FROM book_tags
+            WHERE isbn = ? AND tag_id = ?
+        """, (isbn, tag_id)).rowcount
+    if affected:
+        cache_manager.bump("book_tags", f"book:{isbn}")
     
     if affected == 0:
         raise HTTPException(status_code=404, detail="Bu kitap için etiket bulunamadı.")
@@ -1609,82 +1972,72 @@ def remove_tag_from_book(isbn: str, tag_id: int):
 # (Google Books tabanlı olanla ad çakışmasını önlemek için yinelenen yerel öneri uç noktası kaldırıldı)
 
 # --- Filtrelerle Gelişmiş Arama ---
-@app.post("/books/search/enhanced", response_model=List[BookModel])
-def enhanced_search(params: AdvancedSearchParams):
-    """Yıl aralığı ve etiketler dahil olmak üzere birden çok filtreli geliştirilmiş arama."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT DISTINCT b.* FROM books b"
-    conditions = []
-    joins = []
-    query_params = []
-    
-    # Puan filtresi belirtilmişse incelemelerle birleştir
-    if params.min_rating:
-        joins.append("LEFT JOIN reviews r ON b.isbn = r.isbn")
-    
-    # Etiket filtresi belirtilmişse etiketlerle birleştir
-    if params.tag_ids:
-        joins.append("JOIN book_tags bt ON b.isbn = bt.isbn")
-    
-    # Sorguya birleştirmeler ekle
-    if joins:
-        query += " " + " ".join(joins)
-    
-    # Koşulları oluştur
-    if params.title:
-        conditions.append("b.title LIKE ?")
-        query_params.append(f"%{params.title}%")
-    
-    if params.author:
-        conditions.append("b.author LIKE ?")
-        query_params.append(f"%{params.author}%")
-    
-    if params.isbn:
-        conditions.append("b.isbn LIKE ?")
-        query_params.append(f"%{params.isbn}%")
-    
-    if params.publish_year_from:
-        conditions.append("b.publish_year >= ?")
-        query_params.append(params.publish_year_from)
-    
-    if params.publish_year_to:
-        conditions.append("b.publish_year <= ?")
-        query_params.append(params.publish_year_to)
-    
-    if params.tag_ids:
-        placeholders = ",".join("?" * len(params.tag_ids))
-        conditions.append(f"bt.tag_id IN ({placeholders})")
-        query_params.extend(params.tag_ids)
-    
-    # Koşullar varsa WHERE yan tümcesi ekle
+# Filtre adı -> WHERE koşulu; koşullar her zaman bu sırayla eklenir ki aynı filtre kümesi aynı SQL'i üretsin.
+# Etiket ve puan filtreleri birleştirme yerine alt sorgu ile uygulanır: satırlar çoğalmaz,
+# DISTINCT/GROUP BY gerekmez ve her iki alt sorgu da kapsayan dizinlerden yanıtlanır.
+_ENHANCED_SEARCH_CONDITIONS = (
+    ("title", "b.title LIKE ?"),
+    ("author", "b.author LIKE ?"),
+    ("isbn", "b.isbn LIKE ?"),
+    ("publish_year_from", "b.publish_year >= ?"),
+    ("publish_year_to", "b.publish_year <= ?"),
+    ("tag_ids", "b.isbn IN (SELECT isbn FROM book_tags WHERE tag_id IN ({placeholders}))"),
+    # İncelemesi olmayan kitapların ortalaması NULL'dur ve filtreden geçmez
+    ("min_rating", "(SELECT AVG(r.rating) FROM reviews r WHERE r.isbn = b.isbn) >= ?"),
+)
+
+@lru_cache(maxsize=64)
+def _build_enhanced_sql(active: frozenset, n_tags: int) -> str:
+    """Etkin filtre kümesi için arama SQL'ini kur; aynı dize sqlite3'ün hazır ifade önbelleğinde yeniden kullanılır."""
+    conditions = [
+        cond.format(placeholders=",".join("?" * n_tags)) if name == "tag_ids" else cond
+        for name, cond in _ENHANCED_SEARCH_CONDITIONS
+        if name in active
+    ]
+    query = "SELECT b.title, b.author, b.isbn, b.cover_url FROM books b"
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
+    return query
+
+@app.post("/books/search/enhanced", response_model=None, responses={200: {"model": List[BookModel]}})
+def enhanced_search(params: AdvancedSearchParams, conn: sqlite3.Connection = Depends(get_read_db)):
+    """Yıl aralığı ve etiketler dahil olmak üzere birden çok filtreli geliştirilmiş arama."""
+    # Parametreler _ENHANCED_SEARCH_CONDITIONS sırasıyla bağlanır
+    values = {
+        "title": f"%{params.title}%" if params.title else None,
+        "author": f"%{params.author}%" if params.author else None,
+        "isbn": f"%{params.isbn}%" if params.isbn else None,
+        "publish_year_from": params.publish_year_from or None,
+        "publish_year_to": params.publish_year_to or None,
+        "tag_ids": params.tag_ids or None,
+        "min_rating": params.min_rating or None,
+    }
+    active = []
+    query_params = []
+    for name, _ in _ENHANCED_SEARCH_CONDITIONS:
+        value = values[name]
+        if value is None:
+            continue
+        active.append(name)
+        if name == "tag_ids":
+            query_params.extend(value)
+        else:
+            query_params.append(value)
     
-    # Puan filtresi için GROUP BY ve HAVING ekle
-    if params.min_rating:
-        query += " GROUP BY b.isbn HAVING AVG(r.rating) >= ?"
-        query_params.append(params.min_rating)
-    
-    cursor.execute(query, query_params)
-    results = cursor.fetchall()
-    conn.close()
-    
-    books = []
-    for row in results:
-        book_dict = {
-            'isbn': row['isbn'],
-            'title': row['title'],
-            'author': row['author'],
-            'cover_url': row['cover_url'],
-            'created_at': row['created_at']
-        }
-        books.append(Book.from_dict(book_dict))
+    query = _build_enhanced_sql(frozenset(active), len(params.tag_ids or ()))
+    cursor = conn.execute(query, query_params)
     
-    return [BookModel(**b.to_dict()) for b in books]
+    # Yalnızca BookModel sütunları seçilir; satırlar Book nesnesine dönüştürülmeden doğrudan kodlanır
+    return DefaultJSONResponse(content=[dict(row) for row in cursor])
 
 # --- Statik Dosyalar ---
+# Disk önbelleğindeki kapaklar /static/covers/{isbn}-{size}.jpg altında doğrudan sunulur
+# (daha genel /static bağlamasından önce eklenmelidir)
+try:
+    os.makedirs(settings.cover_cache_dir, exist_ok=True)
+except OSError:
+    pass
+app.mount("/static/covers", StaticFiles(directory=settings.cover_cache_dir, check_dir=False), name="covers")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.get("/")
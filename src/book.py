@@ -6,6 +6,16 @@ import json
 class Book:
     """Kütüphanedeki tek bir kitap öğesini temsil eder."""
 
+    # Sabit öznitelik kümesi: örnek başına __dict__ yok, daha az bellek ve daha hızlı öznitelik erişimi
+    __slots__ = (
+        "title", "author", "isbn", "cover_url", "created_at",
+        # Google Books alanları
+        "page_count", "categories", "published_date", "publisher", "language", "description",
+        "google_rating", "google_rating_count",
+        # AI alanları
+        "ai_summary", "ai_summary_generated_at", "sentiment_score", "data_sources",
+    )
+
     def __init__(self, title: str, author: str, isbn: str, cover_url: str | None = None, created_at: str | None = None,
                  # Google Books alanları
                  page_count: int | None = None, categories: list | None = None, published_date: str | None = None,
@@ -63,21 +73,20 @@ class Book:
         }
 
     @staticmethod
-    def from_dict(data: dict) -> "Book":
-        # SQLite'tan gelen JSON dize alanlarını Python listelerine normalleştirin
-        cats = data.get("categories")
-        if isinstance(cats, str):
+    def _parse_json_list(value):
+        """SQLite'ta JSON dizesi olarak saklanan liste alanını Python listesine çevir."""
+        if isinstance(value, str):
             try:
-                cats = json.loads(cats)
+                return json.loads(value)
             except Exception:
-                cats = [cats] if cats else []
+                return [value] if value else []
+        return value
 
-        sources = data.get("data_sources")
-        if isinstance(sources, str):
-            try:
-                sources = json.loads(sources)
-            except Exception:
-                sources = [sources] if sources else []
+    @staticmethod
+    def from_dict(data: dict) -> "Book":
+        # SQLite'tan gelen JSON dize alanlarını Python listelerine normalleştirin
+        cats = Book._parse_json_list(data.get("categories"))
+        sources = Book._parse_json_list(data.get("data_sources"))
 
         return Book(
             title=data["title"], 
@@ -99,4 +108,19 @@ class Book:
             ai_summary_generated_at=data.get("ai_summary_generated_at"),
             sentiment_score=data.get("sentiment_score"),
             data_sources=sources
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def from_row(row) -> "Book":
+        """Tüm kitap sütunlarını seçen bir sqlite3.Row'dan doğrudan oluştur.
+
+        from_dict(dict(row)) ile aynı sonucu verir, ancak ara sözlük kopyası ve .get çağrıları yapılmaz.
+        """
+        return Book(
+            row["title"], row["author"], row["isbn"], row["cover_url"], row["created_at"],
+            row["page_count"], Book._parse_json_list(row["categories"]), row["published_date"],
+            row["publisher"], row["language"], row["description"],
+            row["google_rating"], row["google_rating_count"],
+            row["ai_summary"], row["ai_summary_generated_at"], row["sentiment_score"],
+            Book._parse_json_list(row["data_sources"]),
+        )
@@ -2,11 +2,20 @@ import sqlite3
 import json
 import os
 import sys
-from typing import List, Dict, Any
 
 import tempfile
+from contextlib import contextmanager
+from itertools import count, islice
 from dotenv import load_dotenv
 
+# İsteğe bağlı: ijson varsa library.json tamamı belleğe alınmadan akış olarak okunur
+try:
+    import ijson
+    _JSON_STREAM_ERRORS: tuple = (ijson.JSONError,)
+except ImportError:
+    ijson = None
+    _JSON_STREAM_ERRORS = ()
+
 # .env'den ortam değişkenlerinin okunmadan önce yüklendiğinden emin olun.
 # Bu, modüllerin, load_dotenv() çağrılmadan önce os.environ'u okuyacak bir sırada içe aktarıldığı sorunları önler (ör. library -> database -> config).
 load_dotenv()
@@ -26,37 +35,64 @@ JSON_FILE = "library.json"
 # Daha iyi performans için bağlantı havuzu
 _connection_pool = None
 _pool_lock = None
+# Yalnızca okuma yapan istekler için ayrı havuz; yazma havuzundaki bağlantılarla yarışmaz
+_read_pool = None
+READ_POOL_SIZE = max(2, min(os.cpu_count() or 2, 8))
+# WAL'da yazarlar dosya düzeyinde zaten sıralanır; havuzda tek yazma bağlantısı tutulur,
+# eşzamanlı ikinci bir yazar boş havuzda geçici bir bağlantı açar
+WRITE_POOL_SIZE = 1
+
+# Daha iyi eşzamanlı erişim için WAL modunu etkinleştir (okuyucular yazarları beklemez).
+# journal_mode dosyada kalıcıdır; süreç başına her dosyaya bir kez uygulanır
+_FILE_PRAGMAS = "PRAGMA journal_mode=WAL;"
+# Bu süreçte WAL'a alınmış veritabanı dosyaları
+_wal_files: set = set()
+
+# Her yeni bağlantıda uygulanan ayarlar (bunlar dosyada saklanmaz, bağlantıya özeldir)
+_CONNECTION_PRAGMAS = (
+    # Performans için SQLite ayarlarını optimize et
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA busy_timeout=5000;"  # kilitli veritabanında hemen SQLITE_BUSY yerine 5 sn bekle
+    "PRAGMA cache_size=-64000;"  # 64MB önbellek
+    "PRAGMA temp_store=MEMORY;"
+    "PRAGMA mmap_size=268435456;"  # 256MB mmap
+    # WAL büyümesini sınırla: ~1000 sayfada (≈4MB) otomatik kontrol noktası, sıfırlanan WAL 64MB'a kırpılır
+    "PRAGMA wal_autocheckpoint=1000;"
+    "PRAGMA journal_size_limit=67108864;"
+    # Şemadaki ON DELETE CASCADE tanımları yalnızca bu ayarla uygulanır
+    "PRAGMA foreign_keys=ON;"
+)
+
+def _open_connection() -> sqlite3.Connection:
+    """PRAGMA ayarları uygulanmış yeni bir SQLite bağlantısı aç."""
+    path = DATABASE_FILE
+    # Silinip yeniden oluşturulan dosya (ör. test kurulumu) WAL ayarını kaybeder; yoksa yeniden uygulanır
+    needs_wal = path not in _wal_files or not os.path.exists(path)
+    # İstek bağımlılıkları bağlantıyı açan iş parçacığından farklı bir iş parçacığında kapatabilir
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # Yeni bağlantıda bekleyen işlem yoktur; tüm ayarlar tek executescript çağrısıyla uygulanır
+    conn.executescript(_FILE_PRAGMAS + _CONNECTION_PRAGMAS if needs_wal else _CONNECTION_PRAGMAS)
+    _wal_files.add(path)
+    return conn
 
 def _initialize_connection_pool():
     """Daha iyi performans için bağlantı havuzunu başlat."""
     global _connection_pool, _pool_lock
     import threading
-    from contextlib import contextmanager
     import queue
     
     if _connection_pool is None:
         _pool_lock = threading.Lock()
-        # Eşzamanlı erişim için 5 bağlantılık bir havuz oluştur
-        _connection_pool = queue.Queue(maxsize=5)
-        for _ in range(5):
-            conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            # Daha iyi eşzamanlı erişim için WAL modunu etkinleştir
-            conn.execute("PRAGMA journal_mode=WAL;")
-            # Performans için SQLite ayarlarını optimize et
-            conn.execute("PRAGMA synchronous=NORMAL;")
-            conn.execute("PRAGMA cache_size=-64000;")  # 64MB önbellek
-            conn.execute("PRAGMA temp_store=MEMORY;")
-            conn.execute("PRAGMA mmap_size=268435456;")  # 256MB mmap
-            _connection_pool.put(conn)
+        _connection_pool = queue.Queue(maxsize=WRITE_POOL_SIZE)
+        for _ in range(WRITE_POOL_SIZE):
+            _connection_pool.put(_open_connection())
 
 def get_db_connection() -> sqlite3.Connection:
     """Bağlantı havuzu ile SQLite veritabanına bir bağlantı kurar."""
-    # Testler için karmaşıklığı önlemek için basit bağlantı kullanın
+    # Testler için karmaşıklığı önlemek için havuzsuz bağlantı kullanın
     if os.environ.get("PYTEST_CURRENT_TEST") or "pytest" in sys.modules:
-        conn = sqlite3.connect(DATABASE_FILE)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return _open_connection()
     
     global _connection_pool, _pool_lock
     if _connection_pool is None:
@@ -67,13 +103,70 @@ def get_db_connection() -> sqlite3.Connection:
         return _connection_pool.get_nowait()
     except:
         # Havuz boşsa, yeni bir optimize edilmiş bağlantı oluşturun
-        conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-        conn.execute("PRAGMA cache_size=-64000;")
-        conn.execute("PRAGMA temp_store=MEMORY;")
-        return conn
+        return _open_connection()
+
+@contextmanager
+def write_transaction(conn: sqlite3.Connection):
+    """Yazma kilidini baştan alan (BEGIN IMMEDIATE) bir işlem aç; başarıda commit, hatada rollback.
+
+    Ertelenmiş işlemin okuma kilidinden yazma kilidine yükseltilirken SQLITE_BUSY almasını önler.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+def _open_read_connection() -> sqlite3.Connection:
+    """Salt okunur (query_only) bir bağlantı aç; yanlışlıkla yapılan yazmalar hata verir."""
+    conn = _open_connection()
+    conn.execute("PRAGMA query_only=ON;")
+    return conn
+
+def get_read_connection() -> sqlite3.Connection:
+    """Okuma havuzundan salt okunur bir bağlantı al (havuz boşsa yenisini aç)."""
+    if os.environ.get("PYTEST_CURRENT_TEST") or "pytest" in sys.modules:
+        return _open_read_connection()
+    
+    global _read_pool
+    if _read_pool is None:
+        import queue
+        pool = queue.Queue(maxsize=READ_POOL_SIZE)
+        for _ in range(READ_POOL_SIZE):
+            pool.put(_open_read_connection())
+        _read_pool = pool
+    
+    try:
+        return _read_pool.get_nowait()
+    except Exception:
+        return _open_read_connection()
+
+def return_read_connection(conn: sqlite3.Connection) -> None:
+    """Salt okunur bağlantıyı okuma havuzuna iade et; havuz yoksa ya da doluysa kapat."""
+    pool = _read_pool
+    if pool is None or os.environ.get("PYTEST_CURRENT_TEST") or "pytest" in sys.modules:
+        conn.close()
+        return
+    # Açık kalan okuma işlemi WAL kontrol noktasını bekletmesin
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        pool.put_nowait(conn)
+    except Exception:
+        conn.close()
+
+# Yazma havuzuna her bu kadar iadede bir WAL dosyası TRUNCATE kontrol noktasıyla sıfırlanmaya çalışılır
+WAL_CHECKPOINT_EVERY = 1000
+_pool_returns = count(1)
+
+def _try_truncate_wal(conn: sqlite3.Connection) -> None:
+    """WAL'ı beklemeden TRUNCATE kontrol noktasıyla boşaltmayı dene; okuyucu/yazar varsa sonraki tura kalır."""
+    try:
+        conn.executescript("PRAGMA busy_timeout=0; PRAGMA wal_checkpoint(TRUNCATE); PRAGMA busy_timeout=5000;")
+    except sqlite3.Error:
+        conn.execute("PRAGMA busy_timeout=5000;")
 
 def return_connection_to_pool(conn: sqlite3.Connection):
     """Yeniden kullanım için havuza bir bağlantı döndürün."""
@@ -83,170 +176,389 @@ def return_connection_to_pool(conn: sqlite3.Connection):
     
     global _connection_pool
     if _connection_pool is not None:
+        # Yarım kalmış bir yazma (ör. IntegrityError) sonraki kullanıcıya sızmasın
+        if conn.in_transaction:
+            conn.rollback()
+        if next(_pool_returns) % WAL_CHECKPOINT_EVERY == 0:
+            _try_truncate_wal(conn)
         try:
             _connection_pool.put_nowait(conn)
         except:
             # Havuz dolu, bağlantıyı kapat
             conn.close()
+    else:
+        conn.close()
 
-def create_tables() -> None:
-    """Veritabanında mevcut değilse gerekli tabloları oluşturur."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS books (
-            isbn TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            author TEXT NOT NULL,
-            cover_url TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            publish_year INTEGER
-        )
-    """)
-    
-    # Puanlar ve yorumlar için inceleme tablosu
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS reviews (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            isbn TEXT NOT NULL,
-            user_name TEXT NOT NULL,
-            rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
-            comment TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (isbn) REFERENCES books(isbn) ON DELETE CASCADE
-        )
-    """)
-    
-    # Kategoriler/raflar için etiket tablosu
+def close_connection_pool() -> None:
+    """Yazma ve okuma havuzlarındaki tüm bağlantıları kapat (uygulama kapanışında çağrılır)."""
+    global _connection_pool, _read_pool
+    pools = (_connection_pool, _read_pool)
+    _connection_pool = _read_pool = None
+    for pool in pools:
+        if pool is None:
+            continue
+        while True:
+            try:
+                pool.get_nowait().close()
+            except Exception:
+                break
+
+def ensure_api_usage_daily(cursor: sqlite3.Cursor) -> None:
+    """API kullanımının günlük toplam tablosunu oluşturur; ilk oluşturulduğunda loglardan doldurur.
+
+    api_usage_logs tablosunun önceden var olması gerekir. Birden çok süreç aynı anda başlayabildiğinden
+    oluşturma ve doldurma yazma kilidi altında, tablo yeniden denetlenerek yapılır.
+    """
+    exists_sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'api_usage_daily'"
+    if cursor.execute(exists_sql).fetchone() is not None:
+        return
+    conn = cursor.connection
+    # create_tables zaten BEGIN IMMEDIATE içinde çağırır; diğer çağıranlar için kilit burada alınır
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    try:
+        if cursor.execute(exists_sql).fetchone() is None:
+            _create_api_usage_daily(cursor)
+    except BaseException:
+        if own_transaction:
+            conn.rollback()
+        raise
+    if own_transaction:
+        conn.commit()
+
+def _create_api_usage_daily(cursor: sqlite3.Cursor) -> None:
+    """api_usage_daily tablosunu oluştur ve mevcut loglardan doldur; yazma kilidi çağıran tarafından tutulur."""
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tags (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            color TEXT DEFAULT '#3B82F6',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+        CREATE TABLE IF NOT EXISTS api_usage_daily (
+            api_name TEXT NOT NULL,
+            day TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0,
+            successful_calls INTEGER NOT NULL DEFAULT 0,
+            total_response_time_ms INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (api_name, day)
+        ) WITHOUT ROWID
     """)
-    
-    # Kitap-Etiket ilişki tablosu
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS book_tags (
-            isbn TEXT NOT NULL,
-            tag_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (isbn, tag_id),
-            FOREIGN KEY (isbn) REFERENCES books(isbn) ON DELETE CASCADE,
-            FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
-        )
+        INSERT INTO api_usage_daily (api_name, day, calls, successful_calls, total_response_time_ms)
+        SELECT api_name, date(created_at), COUNT(*), SUM(success = 1), SUM(COALESCE(response_time_ms, 0))
+        FROM api_usage_logs
+        GROUP BY api_name, date(created_at)
     """)
-    
-    # API kullanım izleme tabloları
+
+def record_api_usage_daily(cursor: sqlite3.Cursor, api_name: str, success: bool, response_time_ms: int) -> None:
+    """Bugünün günlük toplamını bir çağrı kadar artırır (api_usage_logs kaydıyla aynı işlemde çağrılır)."""
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS api_usage_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            api_name TEXT NOT NULL,
-            endpoint TEXT NOT NULL,
-            success BOOLEAN NOT NULL,
-            response_time_ms INTEGER,
-            characters_used INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
+        INSERT INTO api_usage_daily (api_name, day, calls, successful_calls, total_response_time_ms)
+        VALUES (?, date('now'), 1, ?, ?)
+        ON CONFLICT(api_name, day) DO UPDATE SET
+            calls = calls + 1,
+            successful_calls = successful_calls + excluded.successful_calls,
+            total_response_time_ms = total_response_time_ms + excluded.total_response_time_ms
+    """, (api_name, 1 if success else 0, response_time_ms or 0))
+
+def api_usage_window(cursor: sqlite3.Cursor, api_name: str, days: int = 30) -> tuple:
+    """Son `days` gün için (bugün dahil; toplam çağrı, başarılı çağrı, ortalama yanıt süresi) döndürür.
+
+    Log geçmişinin uzunluğundan bağımsız olarak en fazla `days` satır okunur.
+    """
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS api_usage_stats (
-            id INTEGER PRIMARY KEY,
-            google_books_daily_calls INTEGER DEFAULT 0,
-            hugging_face_monthly_chars INTEGER DEFAULT 0,
-            last_reset_date TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Daha iyi performans için dizinler oluştur
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_isbn ON reviews(isbn)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_tags_isbn ON book_tags(isbn)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_tags_tag_id ON book_tags(tag_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_usage_logs_api_name ON api_usage_logs(api_name)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_usage_logs_created_at ON api_usage_logs(created_at)")
-    
-    
-    # Sütunların var olup olmadığını kontrol edin, yoksa ekleyin (geçiş için)
-    cursor.execute("PRAGMA table_info(books)")
-    columns = [column[1] for column in cursor.fetchall()]
-    
+        SELECT COALESCE(SUM(calls), 0), COALESCE(SUM(successful_calls), 0), SUM(total_response_time_ms)
+        FROM api_usage_daily
+        WHERE api_name = ? AND day >= date('now', ?)
+    """, (api_name, f"-{days - 1} days"))
+    total_calls, successful_calls, total_ms = cursor.fetchone()
+    avg_response_time = (total_ms / total_calls) if total_calls else 0
+    return total_calls, successful_calls, avg_response_time
+
+# SQLite 3.37+ STRICT tabloları: türler zorlanır, yakınlık (affinity) dönüşümleri atlanır.
+# Yalnızca yeni oluşturulan tablolara uygulanır; mevcut tablolar olduğu gibi kalır.
+STRICT_SUFFIX = " STRICT" if sqlite3.sqlite_version_info >= (3, 37) else ""
+
+# Sabit şema: tek executescript ile tek ayrıştırma/gidişte uygulanır. books tablosu güncel sütun kümesiyle
+# oluşturulur; eski veritabanlarındaki eksik sütunlar _BOOKS_MIGRATION_COLUMNS ile eklenir.
+# books sütunları: id, rowid'nin açık takma adıdır (INTEGER PRIMARY KEY). Örtük rowid VACUUM ile yeniden
+# numaralanabilir; FTS dizini (content_rowid) ve ekleme sırası bu yüzden kararlı id sütununa dayanır.
+_BOOKS_COLUMNS_SQL = """
+    id INTEGER PRIMARY KEY,
+    isbn TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    cover_url TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    publish_year INTEGER,
+    page_count INTEGER,
+    categories TEXT,
+    published_date TEXT,
+    publisher TEXT,
+    language TEXT DEFAULT 'tr',
+    description TEXT,
+    google_rating REAL,
+    google_rating_count INTEGER,
+    ai_summary TEXT,
+    ai_summary_generated_at TIMESTAMP,
+    sentiment_score REAL,
+    data_sources TEXT
+"""
+
+_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS books ({_BOOKS_COLUMNS_SQL});
+
+-- Kitap verisi sürümü: books'taki her yazmada tetikleyicilerle (_BOOKS_INDEX_SQL) artar, böylece tüm
+-- çalışan süreçler aynı değeri görür. instance, veritabanı yeniden oluşturulduğunda sayacın eski değerlerle
+-- çakışmasını önler
+CREATE TABLE IF NOT EXISTS library_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    instance TEXT NOT NULL DEFAULT (lower(hex(randomblob(8)))),
+    books_version INTEGER NOT NULL DEFAULT 0
+){STRICT_SUFFIX};
+INSERT OR IGNORE INTO library_meta (id) VALUES (1);
+
+-- Puanlar ve yorumlar için inceleme tablosu
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    isbn TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
+    comment TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (isbn) REFERENCES books(isbn) ON DELETE CASCADE
+){STRICT_SUFFIX};
+
+-- Kategoriler/raflar için etiket tablosu
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    color TEXT DEFAULT '#3B82F6',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+){STRICT_SUFFIX};
+
+-- Kitap-Etiket ilişki tablosu
+CREATE TABLE IF NOT EXISTS book_tags (
+    isbn TEXT NOT NULL,
+    tag_id INTEGER NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (isbn, tag_id),
+    FOREIGN KEY (isbn) REFERENCES books(isbn) ON DELETE CASCADE,
+    FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
+){STRICT_SUFFIX};
+
+-- API kullanım izleme tabloları
+CREATE TABLE IF NOT EXISTS api_usage_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    api_name TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    response_time_ms INTEGER,
+    characters_used INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+){STRICT_SUFFIX};
+
+CREATE TABLE IF NOT EXISTS api_usage_stats (
+    id INTEGER PRIMARY KEY,
+    google_books_daily_calls INTEGER DEFAULT 0,
+    hugging_face_monthly_chars INTEGER DEFAULT 0,
+    last_reset_date TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+){STRICT_SUFFIX};
+
+-- Daha iyi performans için dizinler
+CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating);
+-- book_tags(isbn, tag_id) birincil anahtar dizini ISBN tarafını karşılar; etiket tarafı için
+-- (tag_id, isbn) kapsayan dizini birleştirmeleri tablo satırına inmeden çözer
+CREATE INDEX IF NOT EXISTS idx_book_tags_tag_isbn ON book_tags(tag_id, isbn);
+DROP INDEX IF EXISTS idx_book_tags_isbn;
+DROP INDEX IF EXISTS idx_book_tags_tag_id;
+CREATE INDEX IF NOT EXISTS idx_api_usage_logs_api_name ON api_usage_logs(api_name);
+CREATE INDEX IF NOT EXISTS idx_api_usage_logs_created_at ON api_usage_logs(created_at);
+
+-- Arama optimizasyonu için bileşik dizinler
+CREATE INDEX IF NOT EXISTS idx_reviews_isbn_rating ON reviews(isbn, rating);
+-- Yorum listesi (isbn eşitliği + created_at sıralaması) ayrı sıralama adımı olmadan dizinden okunur
+CREATE INDEX IF NOT EXISTS idx_reviews_isbn_created ON reviews(isbn, created_at DESC);
+-- Tek sütunlu isbn dizini iki bileşik dizinin önekidir; yalnızca yazma maliyeti ekler
+DROP INDEX IF EXISTS idx_reviews_isbn;
+CREATE INDEX IF NOT EXISTS idx_api_usage_stats_date ON api_usage_logs(created_at DESC);
+"""
+
+# Eski veritabanlarında bulunmayabilecek books sütunları (geçiş için), sütun adı -> ALTER tanımı
+_BOOKS_MIGRATION_COLUMNS = (
     # Orijinal sütunlar
-    if 'created_at' not in columns:
-        # SQLite, ALTER TABLE aracılığıyla sabit olmayan bir varsayılanla sütun eklemeye izin vermez.
-        # Bu yüzden sütunu varsayılan olmadan ekler ve ardından değerleri geri doldururuz.
-        cursor.execute("ALTER TABLE books ADD COLUMN created_at TIMESTAMP")
-        cursor.execute("UPDATE books SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
-    if 'publish_year' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN publish_year INTEGER")
-    
+    ("created_at", "TIMESTAMP"),
+    ("publish_year", "INTEGER"),
     # Google Books API sütunları
-    if 'page_count' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN page_count INTEGER")
-    if 'categories' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN categories TEXT")  # JSON dizisi
-    if 'published_date' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN published_date TEXT")
-    if 'publisher' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN publisher TEXT")
-    if 'language' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN language TEXT DEFAULT 'tr'")
-    if 'description' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN description TEXT")
-    if 'google_rating' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN google_rating REAL")
-    if 'google_rating_count' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN google_rating_count INTEGER")
-    
+    ("page_count", "INTEGER"),
+    ("categories", "TEXT"),  # JSON dizisi
+    ("published_date", "TEXT"),
+    ("publisher", "TEXT"),
+    ("language", "TEXT DEFAULT 'tr'"),
+    ("description", "TEXT"),
+    ("google_rating", "REAL"),
+    ("google_rating_count", "INTEGER"),
     # AI tarafından oluşturulan sütunlar
-    if 'ai_summary' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN ai_summary TEXT")
-    if 'ai_summary_generated_at' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN ai_summary_generated_at TIMESTAMP")
-    if 'sentiment_score' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN sentiment_score REAL")
-    if 'data_sources' not in columns:
-        cursor.execute("ALTER TABLE books ADD COLUMN data_sources TEXT")  # JSON dizisi
-    
-    # Varsayılan etiketler yoksa ekle
-    default_tags = [
-        ('Okunacaklar', '#10B981'),
-        ('Okunanlar', '#06B6D4'),
-        ('Favoriler', '#EF4444'),
-        ('2024 Listesi', '#8B5CF6'),
-        ('Tekrar Oku', '#F59E0B')
-    ]
-    
-    for tag_name, color in default_tags:
-        cursor.execute("INSERT OR IGNORE INTO tags (name, color) VALUES (?, ?)", (tag_name, color))
-    
-    # "Okunanlar" etiketinin, zaten var olsa bile güncellenmiş turkuaz rengini kullandığından emin olun
-    cursor.execute("UPDATE tags SET color = ? WHERE name = ?", ('#06B6D4', 'Okunanlar'))
-    
-    # Kitaplar tablosu için ek performans dizinleri (sütunlar eklendikten sonra)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_author ON books(author)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_created_at ON books(created_at)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_title_author ON books(title, author)")
-    
-    # Dizin oluşturmadan önce published_date sütununun var olup olmadığını kontrol edin
-    cursor.execute("PRAGMA table_info(books)")
-    updated_columns = [column[1] for column in cursor.fetchall()]
-    if 'published_date' in updated_columns:
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_published_date ON books(published_date)")
-    if 'language' in updated_columns:
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_language ON books(language)")
-    
-    # Arama optimizasyonu için bileşik dizinler
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_isbn_rating ON reviews(isbn, rating)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_usage_stats_date ON api_usage_logs(created_at DESC)")
+    ("ai_summary", "TEXT"),
+    ("ai_summary_generated_at", "TIMESTAMP"),
+    ("sentiment_score", "REAL"),
+    ("data_sources", "TEXT"),  # JSON dizisi
+)
+
+# books'un id sütunu olmadan oluşturulmuş eski sürümünden kopyalanan sütunlar (rowid -> id olarak taşınır)
+_BOOKS_COPY_COLUMNS = ", ".join(("isbn", "title", "author", "cover_url") + tuple(name for name, _ in _BOOKS_MIGRATION_COLUMNS))
+
+# Geçişle eklenen sütunlara bağlı olduğu ve tablo yeniden kurulduğunda silindikleri için
+# ALTER'lardan sonra oluşturulan dizinler ve tetikleyiciler
+_BOOKS_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)",
+    "CREATE INDEX IF NOT EXISTS idx_books_author ON books(author)",
+    "CREATE INDEX IF NOT EXISTS idx_books_created_at ON books(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_books_title_author ON books(title, author)",
+    "CREATE INDEX IF NOT EXISTS idx_books_published_date ON books(published_date)",
+    "CREATE INDEX IF NOT EXISTS idx_books_language ON books(language)",
+    """CREATE TRIGGER IF NOT EXISTS books_version_ai AFTER INSERT ON books BEGIN
+        UPDATE library_meta SET books_version = books_version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_version_ad AFTER DELETE ON books BEGIN
+        UPDATE library_meta SET books_version = books_version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_version_au AFTER UPDATE ON books BEGIN
+        UPDATE library_meta SET books_version = books_version + 1 WHERE id = 1;
+    END""",
+)
+
+# PRAGMA user_version'a yazılan şema sürümü; _SCHEMA_SQL, geçişler veya dizinler her değiştiğinde artırılır
+SCHEMA_VERSION = 4
+
+_DEFAULT_TAGS = (
+    ('Okunacaklar', '#10B981'),
+    ('Okunanlar', '#06B6D4'),
+    ('Favoriler', '#EF4444'),
+    ('2024 Listesi', '#8B5CF6'),
+    ('Tekrar Oku', '#F59E0B'),
+)
+
+def create_tables() -> None:
+    """Veritabanında mevcut değilse gerekli tabloları oluşturur."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Şema zaten bu (veya daha yeni) sürümdeyse DDL ve sütun denetimleri tamamen atlanır
+    if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        cursor.execute("PRAGMA optimize")
+        return_connection_to_pool(conn)
+        return
+    # Tüm şema ve geçiş tek bir işlemde uygulanır (tek commit). executescript bekleyen işlemi önce
+    # commit ettiğinden BEGIN IMMEDIATE betiğin içinde verilir; işlem betikten sonra açık kalır.
+    # books yeniden kurulurken DROP TABLE, reviews/book_tags'e ON DELETE CASCADE uygulamasın.
+    # foreign_keys işlem içinde değiştirilemediği için BEGIN'den önce kapatılır.
+    cursor.execute("PRAGMA foreign_keys=OFF")
+    try:
+        cursor.executescript("BEGIN IMMEDIATE;" + _SCHEMA_SQL)
+        ensure_api_usage_daily(cursor)
+        
+        # Sütunların var olup olmadığını kontrol edin, yoksa ekleyin (geçiş için)
+        columns = {column[1] for column in cursor.execute("PRAGMA table_info(books)")}
+        for name, definition in _BOOKS_MIGRATION_COLUMNS:
+            if name not in columns:
+                cursor.execute(f"ALTER TABLE books ADD COLUMN {name} {definition}")
+        if 'created_at' not in columns:
+            # SQLite, ALTER TABLE aracılığıyla sabit olmayan bir varsayılanla sütun eklemeye izin vermez.
+            # Bu yüzden sütunu varsayılan olmadan ekler ve ardından değerleri geri doldururuz.
+            cursor.execute("UPDATE books SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+        if 'id' not in columns:
+            # Eski books tablosu (isbn birincil anahtar, örtük rowid) yeniden kurulur; mevcut rowid'ler id olur,
+            # böylece ekleme sırası korunur. Eski FTS dizini örtük rowid'e bağlı olduğundan yeniden oluşturulur.
+            cursor.execute(f"CREATE TABLE books_new ({_BOOKS_COLUMNS_SQL})")
+            cursor.execute(
+                f"INSERT INTO books_new (id, {_BOOKS_COPY_COLUMNS}) SELECT rowid, {_BOOKS_COPY_COLUMNS} FROM books"
+            )
+            cursor.execute("DROP TABLE books")
+            cursor.execute("ALTER TABLE books_new RENAME TO books")
+            cursor.execute("DROP TABLE IF EXISTS books_fts")
+        
+        # Kitaplar tablosu için ek performans dizinleri (sütunlar eklendikten sonra)
+        for statement in _BOOKS_INDEX_SQL:
+            cursor.execute(statement)
+        
+        # Varsayılan etiketler yoksa ekle
+        cursor.executemany("INSERT OR IGNORE INTO tags (name, color) VALUES (?, ?)", _DEFAULT_TAGS)
+        
+        # "Okunanlar" etiketinin, zaten var olsa bile güncellenmiş turkuaz rengini kullandığından emin olun
+        cursor.execute("UPDATE tags SET color = ? WHERE name = ?", ('#06B6D4', 'Okunanlar'))
+        
+        # Başlık/yazar/açıklama alt dize aramaları için FTS5 trigram dizini (SQLite >= 3.34).
+        # Tetikleyiciler dizini books tablosuyla eşzamanlı tutar; desteklenmiyorsa arama LIKE taramasına döner.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+        fts_exists = cursor.fetchone() is not None
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                    title, author, description,
+                    content='books', content_rowid='id', tokenize='trigram'
+                )
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+                    INSERT INTO books_fts(rowid, title, author, description)
+                    VALUES (new.id, new.title, new.author, new.description);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+                    INSERT INTO books_fts(books_fts, rowid, title, author, description)
+                    VALUES ('delete', old.id, old.title, old.author, old.description);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, description ON books BEGIN
+                    INSERT INTO books_fts(books_fts, rowid, title, author, description)
+                    VALUES ('delete', old.id, old.title, old.author, old.description);
+                    INSERT INTO books_fts(rowid, title, author, description)
+                    VALUES (new.id, new.title, new.author, new.description);
+                END
+            """)
+            if not fts_exists:
+                # Mevcut kitapları yeni dizine bir kez doldur
+                cursor.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+            fts_ready = True
+        except sqlite3.OperationalError:
+            fts_ready = False
+        
+        # Sürüm aynı işlemde yazılır: yarıda kalan bir kurulum sonraki açılışta baştan tekrarlanır.
+        # FTS5/trigram desteklenmediyse sürüm yazılmaz; SQLite yükseltildiğinde books_fts sonraki açılışta oluşur.
+        if fts_ready:
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        # foreign_keys eskiden kapalıydı: silinmiş kitaplara ait kalmış yorum/etiket satırları temizlenir,
+        # aksi halde aşağıdaki denetim eski veritabanlarının yükseltilmesini engeller
+        cursor.execute("DELETE FROM reviews WHERE isbn NOT IN (SELECT isbn FROM books)")
+        cursor.execute(
+            "DELETE FROM book_tags WHERE isbn NOT IN (SELECT isbn FROM books) OR tag_id NOT IN (SELECT id FROM tags)"
+        )
+        if cursor.execute("PRAGMA foreign_key_check").fetchone() is not None:
+            raise sqlite3.IntegrityError("Şema geçişi sonrası yabancı anahtar ihlali")
+    except BaseException:
+        conn.rollback()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        raise
+    conn.commit()
+    cursor.execute("PRAGMA foreign_keys=ON")
     
+    # Sorgu planlayıcısı için istatistikler: ilk açılışta tam ANALYZE (sqlite_stat1 oluşur),
+    # sonrasında yalnızca gerekli tabloları yeniden analiz eden PRAGMA optimize
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+    if cursor.fetchone() is None:
+        cursor.execute("ANALYZE")
+    else:
+        cursor.execute("PRAGMA optimize")
     conn.commit()
-    conn.close()
+    return_connection_to_pool(conn)
+
+# library.json taşımasında tek executemany çağrısına verilen kayıt sayısı
+MIGRATION_BATCH_SIZE = 5000
+
+def _iter_json_books(f):
+    """library.json'daki kitap kayıtlarını sırayla üretir (ijson varsa akış olarak)."""
+    if ijson is not None:
+        return ijson.items(f, "item")
+    return iter(json.load(f))
 
 def migrate_from_json() -> None:
     """Eski library.json'dan verileri SQLite veritabanına taşır.
@@ -266,42 +578,40 @@ def migrate_from_json() -> None:
     book_count = cursor.fetchone()[0]
     
     if book_count > 0:
-        conn.close()
+        return_connection_to_pool(conn)
         return # Veritabanında zaten veri var, taşıma gerekmez
 
     if not os.path.exists(JSON_FILE):
-        conn.close()
+        return_connection_to_pool(conn)
         return # JSON dosyası mevcut değil
 
     print("Veriler library.json'dan SQLite veritabanına taşınıyor...")
     
     try:
-        with open(JSON_FILE, "r", encoding="utf-8") as f:
-            data: List[Dict[str, Any]] = json.load(f)
-        
-        books_to_insert = []
-        for item in data:
-            # Temel doğrulama
-            if all(k in item for k in ["isbn", "title", "author"]):
-                books_to_insert.append((
-                    item["isbn"],
-                    item["title"],
-                    item["author"],
-                    item.get("cover_url", "")
-                ))
-        
-        if books_to_insert:
-            cursor.executemany(
-                "INSERT OR IGNORE INTO books (isbn, title, author, cover_url) VALUES (?, ?, ?, ?)",
-                books_to_insert
+        with open(JSON_FILE, "rb") as f:
+            # Temel doğrulamadan geçen kayıtlar dosyadan okundukça MIGRATION_BATCH_SIZE'lık parçalara bölünür
+            books_to_insert = (
+                (item["isbn"], item["title"], item["author"], item.get("cover_url", ""))
+                for item in _iter_json_books(f)
+                if all(k in item for k in ("isbn", "title", "author"))
             )
-            conn.commit()
-        print(f"{len(books_to_insert)} kitap başarıyla taşındı.")
+            
+            # Tüm parçalar tek bir işlemde eklenir: kayıt ya da parça başına değil, taşıma başına bir commit
+            inserted = 0
+            with conn:
+                cursor.execute("BEGIN")
+                while batch := list(islice(books_to_insert, MIGRATION_BATCH_SIZE)):
+                    cursor.executemany(
+                        "INSERT OR IGNORE INTO books (isbn, title, author, cover_url) VALUES (?, ?, ?, ?)",
+                        batch
+                    )
+                    inserted += max(cursor.rowcount, 0)
+        print(f"{inserted} kitap başarıyla taşındı.")
 
-    except (json.JSONDecodeError, IOError) as e:
+    except (json.JSONDecodeError, IOError, *_JSON_STREAM_ERRORS) as e:
         print(f"{JSON_FILE} okunurken veya ayrıştırılırken hata oluştu: {e}")
     finally:
-        conn.close()
+        return_connection_to_pool(conn)
 
 def initialize_database():
     """Veritabanını başlatır, gerekirse tabloları oluşturur ve verileri taşır."""
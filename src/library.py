@@ -1,6 +1,6 @@
 import os
 import time
-from typing import List, Optional, Dict, Any, Generator
+from typing import List, Optional, Dict, Any, Generator, Iterable, Tuple
 import shutil
 import sqlite3
 import asyncio
@@ -16,11 +16,19 @@ import tempfile
 from src.book import Book
 from src.services.http_client import get_http_client
 from config.config import settings
-from src.database import get_db_connection, initialize_database, return_connection_to_pool
+from src.database import (
+    get_db_connection, initialize_database, return_connection_to_pool,
+    get_read_connection, return_read_connection,
+)
 from src.services.hugging_face_service import HuggingFaceService
 from src.services.google_books_service import GoogleBooksService
 from src.services.cache_manager import cached, cache_manager
 
+# API'nin ve yerel kapak proxy'sinin temel URL'leri; her kitap/istek için yeniden biçimlendirmemek adına
+# içe aktarmada bir kez hesaplanır
+API_BASE_URL = f"http://{settings.api_host}:{settings.api_port}"
+COVERS_BASE = API_BASE_URL + "/covers/"
+
 
 class Library:
     """Kitap koleksiyonunu ve veri kalıcılığını yönetir."""
@@ -58,39 +66,68 @@ class Library:
         # Test yalıtımını sağlamak için kalıcı bir bellek içi kopya tutmaktan kaçının.
         # list_books/find_book/search_books gibi yöntemler veritabanından okuyacaktır.
         self.books: List[Book] = []
+
+        # (sıralama alanı, azalan mı) -> sıralı ISBN demeti; sürüm değişince tembel olarak yeniden oluşturulur
+        self._sorted_isbns: Dict[Tuple[str, bool], Tuple[str, ...]] = {}
+        self._sorted_version: Optional[str] = None
         
         # Harici hizmetleri başlat
         self.hugging_face = HuggingFaceService() if settings.enable_ai_features else None
         self.google_books = GoogleBooksService() if settings.enable_google_books else None
 
+    @property
+    def version(self) -> str:
+        """Kitap verilerinin mevcut sürümünü döndür; herhangi bir değişiklikten sonra farklı olur.
+
+        Sayaç veritabanında tutulur ve books tetikleyicileriyle artar; böylece API katmanının ETag ve
+        yanıt önbellekleri tüm çalışan (worker) süreçlerde aynı sürümü görür.
+        """
+        conn = get_read_connection()
+        try:
+            row = conn.execute("SELECT instance, books_version FROM library_meta WHERE id = 1").fetchone()
+        finally:
+            return_read_connection(conn)
+        return f"{row[0]}-{row[1]:x}" if row else "0"
+
     # ------------------------- Çekirdek işlemler ------------------------- #
+    _INSERT_BOOK_SQL = """
+        INSERT {conflict} INTO books (
+            isbn, title, author, cover_url, page_count, categories,
+            published_date, publisher, language, description,
+            google_rating, google_rating_count, data_sources,
+            ai_summary, ai_summary_generated_at, sentiment_score
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    @staticmethod
+    def _insert_params(book: Book) -> tuple:
+        """Kitabı INSERT INTO books sütun sırasına uygun parametre demetine çevir."""
+        return (
+            book.isbn, book.title, book.author, book.cover_url,
+            book.page_count, json.dumps(book.categories) if book.categories else None,
+            book.published_date, book.publisher, book.language, book.description,
+            book.google_rating, book.google_rating_count,
+            json.dumps(book.data_sources) if book.data_sources else None,
+            book.ai_summary, book.ai_summary_generated_at, book.sentiment_score
+        )
+
+    @staticmethod
+    def duplicate_isbn_message(isbn: str) -> str:
+        """Zaten var olan bir ISBN için hata mesajı (test ortamında İngilizce bekleniyor)."""
+        if Library._is_test_env():
+            return f"Book with ISBN {isbn} already exists."
+        return f"ISBN'i {isbn} olan kitap zaten var."
+
     def add_book(self, book: Book) -> None:
         """Önceden oluşturulmuş bir Kitap ekleyin. ISBN'ye göre kopyaları önleyin."""
         book.isbn = self._normalize_isbn(book.isbn)
         if self.find_book(book.isbn):
-            # Test ortamında İngilizce bekleniyor
-            if Library._is_test_env():
-                raise ValueError(f"Book with ISBN {book.isbn} already exists.")
-            raise ValueError(f"ISBN'i {book.isbn} olan kitap zaten var.")
+            raise ValueError(self.duplicate_isbn_message(book.isbn))
 
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO books (
-                    isbn, title, author, cover_url, page_count, categories,
-                    published_date, publisher, language, description,
-                    google_rating, google_rating_count, data_sources,
-                    ai_summary, ai_summary_generated_at, sentiment_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                book.isbn, book.title, book.author, book.cover_url,
-                book.page_count, json.dumps(book.categories) if book.categories else None,
-                book.published_date, book.publisher, book.language, book.description,
-                book.google_rating, book.google_rating_count,
-                json.dumps(book.data_sources) if book.data_sources else None,
-                book.ai_summary, book.ai_summary_generated_at, book.sentiment_score
-            ))
+            cursor.execute(self._INSERT_BOOK_SQL.format(conflict=""), self._insert_params(book))
             conn.commit()
             # Veritabanından created_at değerini al
             cursor.execute("SELECT created_at FROM books WHERE isbn = ?", (book.isbn,))
@@ -98,11 +135,76 @@ class Library:
             if row:
                 book.created_at = row[0]
         except sqlite3.IntegrityError as e:
-            if Library._is_test_env():
-                raise ValueError(f"Book with ISBN {book.isbn} already exists.") from e
-            raise ValueError(f"ISBN'i {book.isbn} olan kitap zaten var.") from e
+            raise ValueError(self.duplicate_isbn_message(book.isbn)) from e
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
+
+    def add_or_get_book(self, book: Book) -> Tuple[Book, bool]:
+        """Kitabı ekle ya da aynı ISBN zaten varsa mevcut kaydı döndür.
+
+        (kitap, eklendi_mi) döndürür. Çakışma ValueError ile değil ON CONFLICT ile çözülür;
+        mevcut kayıt yalnızca ekleme yapılmadıysa okunur.
+        """
+        book.isbn = self._normalize_isbn(book.isbn)
+        conn = get_db_connection()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    self._INSERT_BOOK_SQL.format(conflict="") + " ON CONFLICT(isbn) DO NOTHING",
+                    self._insert_params(book),
+                )
+                created = cursor.rowcount == 1
+            if created:
+                row = conn.execute("SELECT created_at FROM books WHERE isbn = ?", (book.isbn,)).fetchone()
+                if row:
+                    book.created_at = row[0]
+                return book, True
+        finally:
+            return_connection_to_pool(conn)
+        existing = self.find_book(book.isbn)
+        if existing is None:
+            # Eşzamanlı silme: çakışma görüldü ama kayıt artık yok
+            raise ValueError(self.duplicate_isbn_message(book.isbn))
+        return existing, False
+
+    def add_books_bulk(self, books: Iterable[Book]) -> Tuple[int, List[str]]:
+        """Kitapları tek bir işlemde (tek commit) toplu ekle.
+
+        Eklenen kitap sayısını ve eklenmeyen ISBN'leri (veritabanında zaten var olan ya da
+        aynı girdide tekrarlanan) döndürür. Mevcut kayıtlar değiştirilmez.
+        """
+        pending: Dict[str, Book] = {}
+        skipped: List[str] = []
+        for book in books:
+            book.isbn = self._normalize_isbn(book.isbn)
+            if book.isbn in pending:
+                skipped.append(book.isbn)
+            else:
+                pending[book.isbn] = book
+        if not pending:
+            return 0, skipped
+
+        conn = get_db_connection()
+        try:
+            # Çakışmalar yalnızca hata raporu için önceden okunur; INSERT OR IGNORE yine de mevcut satırları korur
+            isbns = list(pending)
+            existing = set()
+            for start in range(0, len(isbns), 500):
+                chunk = isbns[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    row[0] for row in conn.execute(f"SELECT isbn FROM books WHERE isbn IN ({placeholders})", chunk)
+                )
+            with conn:
+                cursor = conn.executemany(
+                    self._INSERT_BOOK_SQL.format(conflict="OR IGNORE"),
+                    (self._insert_params(b) for isbn, b in pending.items() if isbn not in existing),
+                )
+                inserted = max(cursor.rowcount, 0)
+        finally:
+            return_connection_to_pool(conn)
+        skipped.extend(isbn for isbn in isbns if isbn in existing)
+        return inserted, skipped
 
     def add_book_by_isbn(self, isbn: str) -> Book:
         """Open Library'den ISBN'ye göre meta verileri alın, kitabı oluşturun ve ekleyin."""
@@ -142,7 +244,7 @@ class Library:
 
         author = ", ".join(author_names) if author_names else "Bilinmeyen Yazar"
         
-        cover_url = f"http://{settings.api_host}:{settings.api_port}/covers/{isbn}"
+        cover_url = COVERS_BASE + isbn
 
         book = Book(title=title, author=author, isbn=isbn, cover_url=cover_url)
         self.add_book(book)
@@ -161,11 +263,11 @@ class Library:
                 return True
             return False
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
 
     def list_books(self) -> List[Book]:
         """Veritabanındaki tüm kitapları listele (her çağrıda taze)."""
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.execute(
                 """
@@ -177,13 +279,93 @@ class Library:
                 """
             )
             rows = cursor.fetchall()
-            return [Book.from_dict(dict(row)) for row in rows]
+            return [Book.from_row(row) for row in rows]
         finally:
-            conn.close()
+            return_read_connection(conn)
     
+    # Sayfalı listeleme için sıralama anahtarları (API'deki sort_by değerleri)
+    _SORT_KEYS = {
+        "title": lambda row: row["title"].lower(),
+        "author": lambda row: row["author"].lower(),
+        "created_at": lambda row: row["created_at"] or "",
+    }
+
+    def _sorted_index(self, sort_by: str, descending: bool, version: Optional[str] = None) -> Tuple[str, ...]:
+        """Verilen alana göre sıralı ISBN demetini döndür; yalnızca veriler değiştiğinde yeniden sıralanır."""
+        if version is None:
+            version = self.version
+        if version != self._sorted_version:
+            self._sorted_isbns = {}
+            self._sorted_version = version
+        index = self._sorted_isbns.get((sort_by, descending))
+        if index is None:
+            conn = get_read_connection()
+            try:
+                rows = conn.execute("SELECT isbn, title, author, created_at FROM books ORDER BY title").fetchall()
+            finally:
+                return_read_connection(conn)
+            rows.sort(key=self._SORT_KEYS[sort_by], reverse=descending)
+            index = tuple(row["isbn"] for row in rows)
+            self._sorted_isbns[(sort_by, descending)] = index
+        return index
+
+    def list_books_sorted(self, sort_by: str = "title", order: str = "asc", offset: int = 0, limit: int = 100,
+                          version: Optional[str] = None) -> Tuple[List[Book], int]:
+        """Sıralı bir sayfa kitap ve toplam kitap sayısını döndür; yalnızca sayfadaki satırlar yüklenir.
+
+        Çağıran önbellek anahtarı için sürümü zaten okuduysa `version` ile aynı değer kullanılır.
+        """
+        index = self._sorted_index(sort_by, order == "desc", version)
+        page = index[offset:offset + limit]
+        if not page:
+            return [], len(index)
+        conn = get_read_connection()
+        try:
+            cursor = conn.execute(
+                f"""
+                SELECT isbn, title, author, cover_url, created_at,
+                       page_count, categories, published_date, publisher, language, description,
+                       google_rating, google_rating_count, ai_summary, ai_summary_generated_at,
+                       sentiment_score, data_sources
+                FROM books WHERE isbn IN ({",".join("?" * len(page))})
+                """,
+                page
+            )
+            by_isbn = {row["isbn"]: Book.from_row(row) for row in cursor.fetchall()}
+        finally:
+            return_read_connection(conn)
+        return [by_isbn[isbn] for isbn in page if isbn in by_isbn], len(index)
+
+    def iter_books(self, offset: int = 0, limit: Optional[int] = None) -> Generator[Book, None, None]:
+        """Başlığa göre sıralı kitapları tek tek ver; pencere SQL'de uygulanır, tüm liste oluşturulmaz."""
+        conn = get_read_connection()
+        try:
+            cursor = conn.execute(
+                """
+                SELECT isbn, title, author, cover_url, created_at,
+                       page_count, categories, published_date, publisher, language, description,
+                       google_rating, google_rating_count, ai_summary, ai_summary_generated_at,
+                       sentiment_score, data_sources
+                FROM books ORDER BY title LIMIT ? OFFSET ?
+                """,
+                (-1 if limit is None else limit, offset)
+            )
+            for row in cursor:
+                yield Book.from_row(row)
+        finally:
+            return_read_connection(conn)
+
+    def count_books(self) -> int:
+        """Kitap sayısını satırları yüklemeden döndür."""
+        conn = get_read_connection()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        finally:
+            return_read_connection(conn)
+
     def list_books_generator(self, batch_size: int = 100) -> Generator[List[Book], None, None]:
         """Bellek açısından verimli işleme için kitapları toplu halde veren üreteç."""
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.execute("""
                 SELECT isbn, title, author, cover_url, created_at,
@@ -195,7 +377,7 @@ class Library:
             
             batch = []
             for row in cursor:
-                batch.append(Book.from_dict(dict(row)))
+                batch.append(Book.from_row(row))
                 if len(batch) >= batch_size:
                     yield batch
                     batch = []
@@ -204,12 +386,12 @@ class Library:
             if batch:
                 yield batch
         finally:
-            conn.close()
+            return_read_connection(conn)
 
     def find_book(self, isbn: str) -> Optional[Book]:
         """Veritabanından ISBN'ye göre tek bir kitap bul."""
         norm = self._normalize_isbn(isbn)
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.execute(
                 """
@@ -222,9 +404,9 @@ class Library:
                 (norm,)
             )
             row = cursor.fetchone()
-            return Book.from_dict(dict(row)) if row else None
+            return Book.from_row(row) if row else None
         finally:
-            conn.close()
+            return_read_connection(conn)
 
     def update_book(self, isbn: str, *, title: Optional[str] = None, author: Optional[str] = None) -> Optional[Book]:
         """ISBN'ye göre bir kitabın başlığını ve/veya yazarını güncelleyin. Güncellenmiş kitabı veya bulunamazsa None'ı döndürür."""
@@ -249,7 +431,7 @@ class Library:
             conn.execute(f"UPDATE books SET {set_clause} WHERE isbn = ?", params)
             conn.commit()
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
 
         # Yeni getirilmiş güncellenmiş kaydı döndür
         return self.find_book(isbn)
@@ -289,7 +471,7 @@ class Library:
     # ------------------------- Kalıcılık ------------------------- #
     def _load_books_from_db(self) -> List[Book]:
         """Tüm kitapları SQLite veritabanından belleğe yükleyin."""
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.execute("""
                 SELECT isbn, title, author, cover_url, created_at,
@@ -299,14 +481,30 @@ class Library:
                 FROM books ORDER BY title
             """)
             rows = cursor.fetchall()
-            return [Book.from_dict(dict(row)) for row in rows]
+            return [Book.from_row(row) for row in rows]
         finally:
-            conn.close()
+            return_read_connection(conn)
 
     def search_books(self, query: str) -> List[Book]:
-        """Başlığa veya yazara göre kitap arayın."""
-        conn = get_db_connection()
+        """Başlığa, yazara veya açıklamaya göre kitap arayın."""
+        conn = get_read_connection()
         try:
+            # 3+ karakterlik sorgular trigram dizininden aday satırları alır; tablo taranmaz
+            if len(query.strip()) >= 3:
+                try:
+                    cursor = conn.execute("""
+                        SELECT isbn, title, author, cover_url, created_at,
+                               page_count, categories, published_date, publisher, language, description,
+                               google_rating, google_rating_count, ai_summary, ai_summary_generated_at,
+                               sentiment_score, data_sources
+                        FROM books
+                        WHERE id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)
+                        ORDER BY title
+                    """, ('"' + query.replace('"', '""') + '"',))
+                    return [Book.from_row(row) for row in cursor.fetchall()]
+                except sqlite3.OperationalError:
+                    # FTS5/trigram mevcut değil; LIKE taramasına dön
+                    pass
             cursor = conn.execute("""
                 SELECT isbn, title, author, cover_url, created_at,
                        page_count, categories, published_date, publisher, language, description,
@@ -317,13 +515,13 @@ class Library:
                 ORDER BY title
             """, (f"%{query}%", f"%{query}%", f"%{query}%"))
             rows = cursor.fetchall()
-            return [Book.from_dict(dict(row)) for row in rows]
+            return [Book.from_row(row) for row in rows]
         finally:
-            conn.close()
+            return_read_connection(conn)
 
     def get_statistics(self) -> Dict[str, Any]:
         """Kütüphane istatistiklerini alın."""
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM books")
@@ -337,7 +535,38 @@ class Library:
                 "unique_authors": unique_authors
             }
         finally:
-            conn.close()
+            return_read_connection(conn)
+
+    def get_author_histogram(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """En çok kitabı olan yazarları (yazar, kitap sayısı) çiftleri olarak azalan sırada döndür."""
+        conn = get_read_connection()
+        try:
+            rows = conn.execute(
+                "SELECT author, COUNT(*) AS book_count FROM books GROUP BY author "
+                "ORDER BY book_count DESC, author LIMIT ?",
+                (limit,),
+            ).fetchall()
+            return [(row[0], row[1]) for row in rows]
+        finally:
+            return_read_connection(conn)
+
+    def recent_books(self, limit: int = 5) -> List[Book]:
+        """En son eklenen kitapları en yenisi başta olacak şekilde döndür (ekleme sırası kararlı id sütunudur)."""
+        conn = get_read_connection()
+        try:
+            cursor = conn.execute(
+                """
+                SELECT isbn, title, author, cover_url, created_at,
+                       page_count, categories, published_date, publisher, language, description,
+                       google_rating, google_rating_count, ai_summary, ai_summary_generated_at,
+                       sentiment_score, data_sources
+                FROM books ORDER BY id DESC LIMIT ?
+                """,
+                (limit,),
+            )
+            return [Book.from_row(row) for row in cursor]
+        finally:
+            return_read_connection(conn)
 
     # ------------------------- Harici API yardımcıları ------------------------- #
     def _fetch_book_json(self, isbn: str) -> Optional[dict]:
@@ -385,7 +614,7 @@ class Library:
         - Doğrulama başarısız olursa `/covers/{isbn}` proxy'mize geri döner.
         """
         # Varsayılan geri dönüş
-        local_fallback = f"http://{settings.api_host}:{settings.api_port}/covers/{isbn}"
+        local_fallback = COVERS_BASE + isbn
 
         if not candidate_url:
             return local_fallback
@@ -515,7 +744,7 @@ class Library:
                 title=open_library_data["title"],
                 author=open_library_data["author"],
                 isbn=isbn,
-                cover_url=f"http://{settings.api_host}:{settings.api_port}/covers/{isbn}",
+                cover_url=COVERS_BASE + isbn,
                 description=open_library_data.get("description", ""),
                 data_sources=["open_library"]
             )
@@ -562,7 +791,7 @@ class Library:
         except sqlite3.IntegrityError as e:
             raise ValueError(f"Book with ISBN {book.isbn} already exists.") from e
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
 
     def get_enhanced_usage_stats(self) -> Dict[str, Any]:
         """Tüm harici API'ler için kullanım istatistiklerini alın."""
@@ -591,7 +820,7 @@ class Library:
         
         try:
             # Zaten bir AI özetimiz olup olmadığını kontrol edin
-            conn = get_db_connection()
+            conn = get_read_connection()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT ai_summary, ai_summary_generated_at FROM books WHERE isbn = ?", (book.isbn,))
@@ -600,10 +829,10 @@ class Library:
                 if row and row[0]:  # Zaten AI özeti var
                     return row[0]
             finally:
-                conn.close()
+                return_read_connection(conn)
             
             # Yeni özet oluştur
-            description = getattr(book, 'description', '') or ''
+            description = book.description or ''
             summary = await self.hugging_face.generate_book_summary(book.title, book.author, description)
             
             if summary:
@@ -618,7 +847,7 @@ class Library:
                     """, (summary, book.isbn))
                     conn.commit()
                 finally:
-                    conn.close()
+                    return_connection_to_pool(conn)
                 
                 return summary
             
@@ -714,7 +943,7 @@ class Library:
             ))
             conn.commit()
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
 
     def close(self) -> None:
         """Testler için uyumluluk yardımcısı: Kütüphane tarafından tutulan tüm kaynakları kapatın.
@@ -4,5 +4,6 @@ This package contains service modules for external integrations:
 - Google Books API service
 - Hugging Face AI service
 - Cache management service
+- Cover image optimization
 - HTTP client abstraction
 """
\ No newline at end of file
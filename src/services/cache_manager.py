@@ -7,9 +7,10 @@ import json
 import logging
 import pickle
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Sequence, Union
 import hashlib
 import threading
+from collections import OrderedDict
 from functools import wraps
 
 try:
@@ -18,17 +19,92 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Önbellek anahtarı özetleri için xxhash (xxh3) tercih edilir; yoksa stdlib blake2b kullanılır
+try:
+    import xxhash
+
+    def _key_digest(raw: bytes) -> str:
+        return xxhash.xxh3_64_hexdigest(raw)
+except ImportError:
+    def _key_digest(raw: bytes) -> str:
+        return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
 from config.config import settings
 
+# Sabit pickle protokolü: 5 (bant dışı tampon desteği, 3.8+); HIGHEST_PROTOCOL yerine sabit tutulur ki
+# farklı Python sürümlerindeki çalışanlar Redis'teki girişleri birbirinden okuyabilsin
+_PICKLE_PROTOCOL = 5
+
 logger = logging.getLogger(__name__)
 
+class _MemoryShard:
+    """Bellek önbelleğinin bir dilimi: kendi LRU sırası, kova dizini ve kilidi vardır."""
+
+    __slots__ = ("entries", "buckets", "lock")
+
+    def __init__(self):
+        # LRU sırasında tutulur: en son kullanılan sonda, tahliye edilecek olan başta
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Öneke göre kova dizini ("enhanced:123" -> "enhanced"); önek geçersiz kılma tüm dilimi taramaz
+        self.buckets: Dict[str, set] = {}
+        self.lock = threading.RLock()
+
+    def drop(self, key: str) -> bool:
+        """Anahtarı dilimden ve kova dizininden çıkar; kilit çağıran tarafından tutulur."""
+        if self.entries.pop(key, None) is None:
+            return False
+        self._unindex(key)
+        return True
+
+    def _unindex(self, key: str) -> None:
+        """Anahtarı kova dizininden çıkar; kilit çağıran tarafından tutulur."""
+        bucket_name = key.split(":", 1)[0]
+        bucket = self.buckets.get(bucket_name)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[bucket_name]
+
+    def put(self, key: str, entry: tuple, max_entries: int) -> None:
+        """Girişi yaz ve dilimi sınırda tut; kilit çağıran tarafından tutulur."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.buckets.setdefault(key.split(":", 1)[0], set()).add(key)
+        # En uzun süredir kullanılmayan girişler tek tek düşer (O(1)); popitem tek atomik çağrıdır,
+        # kilitsiz okumaların move_to_end'i ile yarışan bir yineleyici açılmaz
+        while len(self.entries) > max_entries:
+            old_key, _ = self.entries.popitem(last=False)
+            self._unindex(old_key)
+
 class CacheManager:
     """Redis ve bellek içi geri dönüşlü yüksek performanslı önbellek yöneticisi."""
     
+    # Bellek içi önbellekte tutulacak en fazla giriş sayısı
+    MEMORY_CACHE_MAX = 1000
+    # Bellek önbelleği bu kadar dilime bölünür; ilgisiz anahtarlar aynı kilidi beklemez
+    MEMORY_CACHE_STRIPES = 16
+    # Redis yokken (ya da etiket çağrıları hata verdiğinde) etiket sürümleri süreç içidir; başka bir
+    # çalışanın yazması burada görülmez. Bu durumda etiketli girişler en fazla bu kadar saniye yaşar
+    LOCAL_TAGGED_TTL = 5
+    # Son Redis etiket hatasından sonra bu kadar saniye boyunca sürümler paylaşılmıyor sayılır
+    TAG_FALLBACK_WINDOW = 60
+    
     def __init__(self):
         self.redis_client = None
-        self.memory_cache = {}
-        self.memory_cache_lock = threading.RLock()
+        self._shards = [_MemoryShard() for _ in range(self.MEMORY_CACHE_STRIPES)]
+        # LRU dilim başına uygulanır; toplam sınır MEMORY_CACHE_MAX olarak kalır
+        self._shard_max = max(1, self.MEMORY_CACHE_MAX // self.MEMORY_CACHE_STRIPES)
+        self._tag_lock = threading.Lock()
+        # Etiket (ör. "book_tags", "book:123") -> sürüm; etiketli girişler yazıldıkları andaki sürümleri taşır
+        self._tag_versions: Dict[str, int] = {}
+        # Redis etiket çağrısı en son başarısız olduğunda ileri alınır; o zamana kadar sürümler yereldir
+        self._tag_fallback_until = datetime.min
         self.cache_stats = {
             'hits': 0,
             'misses': 0,
@@ -46,9 +122,8 @@ class CacheManager:
             return
         
         try:
-            redis_url = getattr(settings, 'redis_url', 'redis://localhost:6379/0')
             self.redis_client = redis.from_url(
-                redis_url,
+                settings.redis_url,
                 decode_responses=False,  # Kodlamayı kendimiz halledeceğiz
                 socket_connect_timeout=1,
                 socket_timeout=1,
@@ -66,19 +141,43 @@ class CacheManager:
         """Önek ile tutarlı bir önbellek anahtarı oluştur."""
         return f"library_cache:{key}"
     
+    def _shard(self, key: str) -> _MemoryShard:
+        """Anahtarın düştüğü bellek dilimini döndür."""
+        return self._shards[hash(key) % self.MEMORY_CACHE_STRIPES]
+
+    # Yalnızca bu türlerdeki değerler JSON yolunu dener; diğerleri (ör. Pydantic modelleri) doğrudan pickle'lanır
+    _JSON_TYPES = frozenset({dict, list, tuple, str, int, float, bool, type(None)})
+
+    @staticmethod
+    def _json_default(obj: Any) -> str:
+        """JSON'a doğrudan sığmayan değerleri dizeye çevir; bayt verisi ve modeller pickle yoluna bırakılır."""
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            raise TypeError("bytes değerleri pickle ile saklanır")
+        if hasattr(obj, "model_dump"):
+            # Modeli dizeye çevirmek geri okunduğunda türünü kaybettirir
+            raise TypeError("model değerleri pickle ile saklanır")
+        return str(obj)
+
     def _serialize_value(self, value: Any) -> bytes:
         """Depolama için değeri serileştir."""
+        if type(value) not in self._JSON_TYPES:
+            # Karmaşık nesneler için JSON denemesi ve istisna maliyeti atlanır
+            return b'p:' + pickle.dumps(value, protocol=_PICKLE_PROTOCOL)
         try:
-            # Basit türler için önce JSON'u dene (daha taşınabilir)
-            json_str = json.dumps(value, default=str, ensure_ascii=False)
+            # Basit türler için önce JSON'u dene (daha taşınabilir); orjson varsa doğrudan bayt üretir
+            if ORJSON_AVAILABLE:
+                return b'j:' + orjson.dumps(value, default=self._json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+            json_str = json.dumps(value, default=self._json_default, ensure_ascii=False)
             return b'j:' + json_str.encode('utf-8')
         except (TypeError, ValueError):
-            # Karmaşık nesneler için pickle'a geri dön
-            return b'p:' + pickle.dumps(value)
+            # İç içe karmaşık nesneler için pickle'a geri dön
+            return b'p:' + pickle.dumps(value, protocol=_PICKLE_PROTOCOL)
     
     def _deserialize_value(self, data: bytes) -> Any:
         """Depolamadan değeri seri durumdan çıkar."""
         if data.startswith(b'j:'):
+            if ORJSON_AVAILABLE:
+                return orjson.loads(data[2:])
             return json.loads(data[2:].decode('utf-8'))
         elif data.startswith(b'p:'):
             return pickle.loads(data[2:])
@@ -105,17 +204,23 @@ class CacheManager:
                 logger.warning(f"Redis get hatası: {e}")
         
         # Bellek önbelleğine geri dön
-        with self.memory_cache_lock:
-            cache_entry = self.memory_cache.get(key)
-            if cache_entry:
-                value, expires_at = cache_entry
-                if datetime.now() < expires_at:
-                    self.cache_stats['hits'] += 1
-                    self.cache_stats['memory_hits'] += 1
-                    return value
-                else:
-                    # Süresi dolmuş, kaldır
-                    del self.memory_cache[key]
+        # Okuma yolu kilitsizdir: dict.get ve move_to_end GIL altında tek atomik çağrıdır
+        shard = self._shard(key)
+        cache_entry = shard.entries.get(key)
+        if cache_entry:
+            value, expires_at = cache_entry
+            if datetime.now() < expires_at:
+                try:
+                    shard.entries.move_to_end(key)
+                except KeyError:
+                    pass  # Bu arada başka bir iş parçacığı tarafından çıkarıldı
+                self.cache_stats['hits'] += 1
+                self.cache_stats['memory_hits'] += 1
+                return value
+            # Süresi dolmuş, kaldır; kova dizinine dokunduğu için kilit altında
+            with shard.lock:
+                if shard.entries.get(key) is cache_entry:
+                    shard.drop(key)
         
         self.cache_stats['misses'] += 1
         return None
@@ -135,22 +240,72 @@ class CacheManager:
                 logger.warning(f"Redis set hatası: {e}")
         
         # Ayrıca yedek olarak bellek önbelleğinde sakla
-        with self.memory_cache_lock:
-            expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
-            self.memory_cache[key] = (value, expires_at)
-            
-            # Bellek önbellek boyutunu sınırla (yalnızca en son 1000 öğeyi tut)
-            if len(self.memory_cache) > 1000:
-                # En eski öğelerin %10'unu kaldır
-                sorted_items = sorted(
-                    self.memory_cache.items(), 
-                    key=lambda x: x[1][1]  # Son kullanma tarihine göre sırala
-                )
-                for k, _ in sorted_items[:100]:
-                    self.memory_cache.pop(k, None)
+        entry = (value, datetime.now() + timedelta(seconds=ttl_seconds))
+        shard = self._shard(key)
+        with shard.lock:
+            shard.put(key, entry, self._shard_max)
         
         return redis_success or True  # Bellekte sakladıysak her zaman True döndür
     
+    def _tag_key(self, tag: str) -> str:
+        return self._make_key(f"tagver:{tag}")
+    
+    def tag_versions(self, tags: Sequence[str]) -> Dict[str, int]:
+        """Verilen etiketlerin güncel sürümlerini döndür (Redis varsa süreçler arası paylaşılır)."""
+        if self.redis_client:
+            try:
+                raw = self.redis_client.mget([self._tag_key(t) for t in tags])
+                return {t: int(v or 0) for t, v in zip(tags, raw)}
+            except Exception as e:
+                logger.warning(f"Redis etiket sürümü okuma hatası: {e}")
+                self._tag_fallback()
+        with self._tag_lock:
+            return {t: self._tag_versions.get(t, 0) for t in tags}
+    
+    def bump(self, *tags: str) -> None:
+        """Etiketlerin sürümünü artır; bu etiketlere bağlı tüm girişler bir sonraki okumada ıskalanır."""
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Redis etiket sürümü artırma hatası: {e}")
+                self._tag_fallback()
+        with self._tag_lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+    
+    def _tag_fallback(self) -> None:
+        """Redis etiket çağrısı başarısız oldu; sürümler bir süre süreç içi sayılır."""
+        self._tag_fallback_until = datetime.now() + timedelta(seconds=self.TAG_FALLBACK_WINDOW)
+    
+    def _tags_shared(self) -> bool:
+        """Etiket sürümleri şu an Redis üzerinden tüm çalışanlarla paylaşılıyor mu?"""
+        return self.redis_client is not None and datetime.now() >= self._tag_fallback_until
+    
+    def set_tagged(self, key: str, value: Any, versions: Dict[str, int], ttl_seconds: int = 3600) -> bool:
+        """Değeri, bağlı olduğu etiketlerin sürümleriyle birlikte sakla.
+
+        `versions` değer hesaplanmadan önce tag_versions() ile alınmalıdır; aradaki bir yazma
+        girişi hemen geçersiz kılar. Sürümler paylaşılmıyorsa (Redis yok ya da son etiket çağrısı
+        yerele düştü) TTL, LOCAL_TAGGED_TTL ile sınırlanır.
+        """
+        if not self._tags_shared():
+            ttl_seconds = min(ttl_seconds, self.LOCAL_TAGGED_TTL)
+        return self.set(key, {"versions": versions, "value": value}, ttl_seconds)
+    
+    def get_tagged(self, key: str) -> Optional[Any]:
+        """set_tagged ile saklanan değeri döndür; bağlı etiketlerden biri o zamandan beri artırıldıysa None."""
+        entry = self.get(key)
+        if not isinstance(entry, dict) or "versions" not in entry:
+            return None
+        versions = entry["versions"]
+        if self.tag_versions(list(versions)) != versions:
+            return None
+        return entry["value"]
+    
     def delete(self, key: str) -> bool:
         """Önbellekten anahtarı sil."""
         cache_key = self._make_key(key)
@@ -162,12 +317,48 @@ class CacheManager:
             except Exception as e:
                 logger.warning(f"Redis delete hatası: {e}")
         
-        with self.memory_cache_lock:
-            memory_deleted = key in self.memory_cache
-            self.memory_cache.pop(key, None)
+        shard = self._shard(key)
+        with shard.lock:
+            memory_deleted = shard.drop(key)
         
         return redis_deleted or memory_deleted
     
+    def delete_many(self, keys: Sequence[str]) -> int:
+        """Birden çok anahtarı tek Redis çağrısıyla sil; silinen sayıyı döndür."""
+        if not keys:
+            return 0
+        count = 0
+        if self.redis_client:
+            try:
+                count = int(self.redis_client.delete(*(self._make_key(k) for k in keys)))
+            except Exception as e:
+                logger.warning(f"Redis delete hatası: {e}")
+        
+        memory_deleted = 0
+        for key in keys:
+            shard = self._shard(key)
+            with shard.lock:
+                memory_deleted += shard.drop(key)
+        
+        return max(count, memory_deleted)
+    
+    def _redis_delete_matching(self, pattern: str, batch_size: int = 500) -> int:
+        """Desenle eşleşen Redis anahtarlarını SCAN ile bul, toplu DEL ile sil.
+
+        KEYS'in aksine sunucuyu tek uzun komutla bloklamaz; silmeler her `batch_size` anahtarda
+        tek bir çok anahtarlı DEL komutuyla gönderilir.
+        """
+        deleted = 0
+        batch = []
+        for key in self.redis_client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += self.redis_client.delete(*batch)
+                batch.clear()
+        if batch:
+            deleted += self.redis_client.delete(*batch)
+        return deleted
+    
     def invalidate_pattern(self, pattern: str) -> int:
         """Desenle eşleşen tüm anahtarları geçersiz kıl."""
         cache_pattern = self._make_key(pattern)
@@ -176,24 +367,28 @@ class CacheManager:
         # Redis'ten geçersiz kıl
         if self.redis_client:
             try:
-                keys = self.redis_client.keys(cache_pattern)
-                if keys:
-                    count += self.redis_client.delete(*keys)
+                count += self._redis_delete_matching(cache_pattern)
             except Exception as e:
                 logger.warning(f"Redis desen geçersiz kılma hatası: {e}")
         
-        # Bellek önbelleğinden geçersiz kıl
-        with self.memory_cache_lock:
-            keys_to_remove = []
-            # Bellek önbelleği için deseni basit önek eşleştirmeye dönüştür
-            prefix = pattern.replace('*', '')
-            for key in self.memory_cache:
-                if key.startswith(prefix):
-                    keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                self.memory_cache.pop(key, None)
-                count += 1
+        # Bellek önbelleğinden geçersiz kıl; her dilimde yalnızca ilgili kova(lar) gezilir.
+        # Dilimler sırayla kilitlenir; dilimler arası bir değişmez olmadığından hepsini aynı anda tutmak gerekmez
+        # Bellek önbelleği için deseni basit önek eşleştirmeye dönüştür
+        prefix = pattern.replace('*', '')
+        bucket, sep, rest = prefix.partition(':')
+        for shard in self._shards:
+            with shard.lock:
+                if sep and not rest:
+                    # "stats:" gibi tam kova önekleri: kovanın tamamı tek seferde bırakılır
+                    keys_to_remove = shard.buckets.pop(bucket, ())
+                elif sep:
+                    keys_to_remove = [k for k in shard.buckets.get(bucket, ()) if k.startswith(prefix)]
+                else:
+                    keys_to_remove = [k for b, keys in shard.buckets.items() if b.startswith(prefix) for k in keys]
+
+                for key in list(keys_to_remove):
+                    if shard.drop(key):
+                        count += 1
         
         return count
     
@@ -202,16 +397,15 @@ class CacheManager:
         redis_cleared = False
         if self.redis_client:
             try:
-                pattern = self._make_key("*")
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    self.redis_client.delete(*keys)
+                self._redis_delete_matching(self._make_key("*"))
                 redis_cleared = True
             except Exception as e:
                 logger.warning(f"Redis temizleme hatası: {e}")
         
-        with self.memory_cache_lock:
-            self.memory_cache.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.buckets.clear()
         
         return redis_cleared
     
@@ -219,7 +413,7 @@ class CacheManager:
         """Önbellek istatistiklerini al."""
         stats = self.cache_stats.copy()
         stats['redis_available'] = self.redis_client is not None
-        stats['memory_cache_size'] = len(self.memory_cache)
+        stats['memory_cache_size'] = sum(len(shard.entries) for shard in self._shards)
         
         if stats['hits'] + stats['misses'] > 0:
             stats['hit_ratio'] = stats['hits'] / (stats['hits'] + stats['misses'])
@@ -231,6 +425,24 @@ class CacheManager:
 # Global önbellek yöneticisi örneği
 cache_manager = CacheManager()
 
+_PRIMITIVE_TYPES = (type(None), bool, int, float, str, bytes)
+
+def _arg_key(value: Any) -> Any:
+    """Argümanın anahtar karşılığı: ilkel değerler (ve onlardan oluşan kaplar) olduğu gibi kalır,
+    diğer nesneler (ör. yöntemlerdeki self) değişebilir durumları yerine tür adıyla temsil edilir."""
+    if isinstance(value, _PRIMITIVE_TYPES):
+        return value
+    if isinstance(value, (tuple, list)):
+        return (type(value).__name__, tuple(_arg_key(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((repr(k), _arg_key(v)) for k, v in value.items())))
+    return ("obj", type(value).__qualname__)
+
+def _args_digest(args: tuple, kwargs: dict) -> str:
+    """Argümanların kararlı özeti; yalnızca ilkel değerler pickle edilir."""
+    key = (_arg_key(args), tuple(sorted((k, _arg_key(v)) for k, v in kwargs.items())))
+    return _key_digest(pickle.dumps(key, protocol=_PICKLE_PROTOCOL))
+
 def cached(ttl_seconds: int = 300, key_prefix: str = ""):
     """İşlev sonuçlarını önbelleğe almak için dekoratör."""
     def decorator(func):
@@ -239,10 +451,8 @@ def cached(ttl_seconds: int = 300, key_prefix: str = ""):
             # İşlev adı ve argümanlarından önbellek anahtarı oluştur
             func_name = f"{key_prefix}:{func.__name__}" if key_prefix else func.__name__
             
-            # Tutarlı anahtar için argümanlardan bir karma oluştur
-            args_str = str(args) + str(sorted(kwargs.items()))
-            args_hash = hashlib.md5(args_str.encode('utf-8')).hexdigest()
-            cache_key = f"{func_name}:{args_hash}"
+            # Tutarlı anahtar için argümanlardan kriptografik olmayan bir karma oluştur
+            cache_key = f"{func_name}:{_args_digest(args, kwargs)}"
             
             # Önbellekten almayı dene
             result = cache_manager.get(cache_key)
@@ -11,7 +11,10 @@ import httpx
 
 from config.config import settings
 from src.services.http_client import get_http_client
-from src.database import get_db_connection
+from src.database import (
+    get_db_connection, return_connection_to_pool, get_read_connection, return_read_connection,
+    ensure_api_usage_daily, record_api_usage_daily, api_usage_window, STRICT_SUFFIX,
+)
 
 
 # Configure logging
@@ -19,7 +22,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class GoogleBookData:
     """Data structure for Google Books API response"""
     isbn: str
@@ -85,27 +88,27 @@ class GoogleBooksService:
             cursor = conn.cursor()
             
             # Create API usage logs table if not exists
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS api_usage_logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     api_name TEXT NOT NULL,
                     endpoint TEXT NOT NULL,
-                    success BOOLEAN NOT NULL,
+                    success INTEGER NOT NULL,
                     response_time_ms INTEGER,
                     characters_used INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                ){STRICT_SUFFIX}
             """)
             
             # Create or update usage stats table
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS api_usage_stats (
                     id INTEGER PRIMARY KEY,
                     google_books_daily_calls INTEGER DEFAULT 0,
                     hugging_face_monthly_chars INTEGER DEFAULT 0,
                     last_reset_date TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                ){STRICT_SUFFIX}
             """)
             
             # Insert initial record if not exists
@@ -122,9 +125,11 @@ class GoogleBooksService:
             if 'google_books_daily_calls' not in columns:
                 cursor.execute("ALTER TABLE api_usage_stats ADD COLUMN google_books_daily_calls INTEGER DEFAULT 0")
             
+            ensure_api_usage_daily(cursor)
+            
             conn.commit()
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
     
     def _check_rate_limit(self) -> bool:
         """Check if we're within daily rate limit"""
@@ -167,7 +172,7 @@ class GoogleBooksService:
             
             return usage or 0
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
     
     def _log_api_usage(self, endpoint: str, success: bool, response_time_ms: int = 0) -> None:
         """Log API usage to database"""
@@ -180,6 +185,7 @@ class GoogleBooksService:
                 INSERT INTO api_usage_logs (api_name, endpoint, success, response_time_ms, characters_used)
                 VALUES (?, ?, ?, ?, ?)
             """, ("google_books", endpoint, success, response_time_ms, 0))
+            record_api_usage_daily(cursor, "google_books", success, response_time_ms)
             
             # Update daily usage if successful
             if success:
@@ -195,7 +201,7 @@ class GoogleBooksService:
         except Exception as e:
             logger.error(f"Failed to log API usage: {e}")
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
     
     async def _make_api_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Make an API request to Google Books"""
@@ -465,7 +471,7 @@ class GoogleBooksService:
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get current API usage statistics"""
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.cursor()
             
@@ -477,19 +483,7 @@ class GoogleBooksService:
             last_reset = row[1] if row else datetime.now().strftime("%Y-%m-%d")
             
             # Get recent API calls
-            cursor.execute("""
-                SELECT COUNT(*) as total_calls,
-                       SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful_calls,
-                       AVG(response_time_ms) as avg_response_time
-                FROM api_usage_logs 
-                WHERE api_name = 'google_books' 
-                AND created_at >= datetime('now', '-30 days')
-            """)
-            
-            stats_row = cursor.fetchone()
-            total_calls = stats_row[0] if stats_row else 0
-            successful_calls = stats_row[1] if stats_row else 0
-            avg_response_time = stats_row[2] if stats_row else 0
+            total_calls, successful_calls, avg_response_time = api_usage_window(cursor, "google_books", 30)
             
             return {
                 "daily_calls_used": daily_usage,
@@ -509,7 +503,7 @@ class GoogleBooksService:
                 }
             }
         finally:
-            conn.close()
+            return_read_connection(conn)
     
     def is_available(self) -> bool:
         """Check if the service is available and within limits"""
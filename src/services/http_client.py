@@ -59,6 +59,10 @@ class OptimizedHTTPClient:
         """Bağlantı havuzu ile asenkron POST isteği"""
         return await self._client.post(url, **kwargs)
     
+    def stream(self, method: str, url: str, **kwargs):
+        """Gövdeyi belleğe almadan parça parça okumak için akış bağlamı döndür (async with ile kullanılır)"""
+        return self._client.stream(method, url, **kwargs)
+    
     def get_sync(self, url: str, **kwargs) -> httpx.Response:
         """Geriye dönük uyumluluk için senkron GET isteği"""
         return self._sync_client.get(url, **kwargs)
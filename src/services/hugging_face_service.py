@@ -11,7 +11,10 @@ import httpx
 
 from config.config import settings
 from src.services.http_client import get_http_client
-from src.database import get_db_connection
+from src.database import (
+    get_db_connection, return_connection_to_pool, get_read_connection, return_read_connection,
+    ensure_api_usage_daily, record_api_usage_daily, api_usage_window, STRICT_SUFFIX,
+)
 
 
 # Configure logging
@@ -26,7 +29,7 @@ class SentimentLabel(Enum):
     NEUTRAL = "NEUTRAL"
 
 
-@dataclass
+@dataclass(slots=True)
 class SentimentResult:
     """Sentiment analizi sonucu"""
     label: SentimentLabel
@@ -39,7 +42,7 @@ class SentimentResult:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class SummaryResult:
     """Metin özetinin sonucu"""
     summary: str
@@ -96,26 +99,26 @@ class HuggingFaceService:
             cursor = conn.cursor()
             
             # Create API usage logs table
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS api_usage_logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     api_name TEXT NOT NULL,
                     endpoint TEXT NOT NULL,
-                    success BOOLEAN NOT NULL,
+                    success INTEGER NOT NULL,
                     response_time_ms INTEGER,
                     characters_used INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                ){STRICT_SUFFIX}
             """)
             
             # Create usage stats table if not exists
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS api_usage_stats (
                     id INTEGER PRIMARY KEY,
                     hugging_face_monthly_chars INTEGER DEFAULT 0,
                     last_reset_date TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                ){STRICT_SUFFIX}
             """)
             
             # Insert initial record if not exists
@@ -126,9 +129,11 @@ class HuggingFaceService:
                     VALUES (0, ?)
                 """, (datetime.now().strftime("%Y-%m-%d"),))
             
+            ensure_api_usage_daily(cursor)
+            
             conn.commit()
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
     
     def _check_character_limit(self, text: str) -> bool:
         """Monthly character limit exceeded"""
@@ -173,7 +178,7 @@ class HuggingFaceService:
             
             return usage
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
     
     def _log_api_usage(self, model: str, characters_used: int, success: bool, response_time_ms: int = 0) -> None:
         """API kullanımını veritabanına kaydet"""
@@ -186,6 +191,7 @@ class HuggingFaceService:
                 INSERT INTO api_usage_logs (api_name, endpoint, success, response_time_ms, characters_used)
                 VALUES (?, ?, ?, ?, ?)
             """, ("hugging_face", model, success, response_time_ms, characters_used))
+            record_api_usage_daily(cursor, "hugging_face", success, response_time_ms)
             
             # Update monthly usage if successful
             if success:
@@ -201,7 +207,7 @@ class HuggingFaceService:
         except Exception as e:
             logger.error(f"Failed to log API usage: {e}")
         finally:
-            conn.close()
+            return_connection_to_pool(conn)
     
     async def _make_api_request(self, model: str, payload: Dict[str, Any]) -> Optional[List[Any]]:
         """Make an API request to Hugging Face
@@ -507,7 +513,7 @@ class HuggingFaceService:
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get current API usage statistics"""
-        conn = get_db_connection()
+        conn = get_read_connection()
         try:
             cursor = conn.cursor()
             
@@ -519,19 +525,7 @@ class HuggingFaceService:
             last_reset = row[1] if row else datetime.now().strftime("%Y-%m-%d")
             
             # Son 30 gün API çağrıları
-            cursor.execute("""
-                SELECT COUNT(*) as total_calls,
-                       SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful_calls,
-                       AVG(response_time_ms) as avg_response_time
-                FROM api_usage_logs 
-                WHERE api_name = 'hugging_face' 
-                AND created_at >= datetime('now', '-30 days')
-            """)
-            
-            stats_row = cursor.fetchone()
-            total_calls = stats_row[0] if stats_row else 0
-            successful_calls = stats_row[1] if stats_row else 0
-            avg_response_time = stats_row[2] if stats_row else 0
+            total_calls, successful_calls, avg_response_time = api_usage_window(cursor, "hugging_face", 30)
             
             return {
                 "monthly_characters_used": monthly_usage,
@@ -550,7 +544,7 @@ class HuggingFaceService:
                 }
             }
         finally:
-            conn.close()
+            return_read_connection(conn)
     
     def is_available(self) -> bool:
         """Check if the service is available and within limits"""
@@ -2068,17 +2068,20 @@ document.addEventListener('DOMContentLoaded', () => {
                 similar = [],
                 aiSummary = cacheGet(aiSummaryCache, isbn) || null;
 
-            const [revRes, ratRes, tagRes, simRes, aiRes] = await Promise.allSettled([
-                apiFetch(`/books/${isbn}/reviews`, { signal }),
-                apiFetch(`/books/${isbn}/rating`, { signal }),
-                apiFetch(`/books/${isbn}/tags`, { signal }),
+            // Yorumlar, puan ve etiketler tek istekte gelir
+            const [bundleRes, simRes, aiRes] = await Promise.allSettled([
+                apiFetch(`/books/${isbn}/detail-bundle`, { signal }),
                 apiFetch(`/books/${isbn}/similar?limit=3`, { signal }),
                 aiSummary ? Promise.resolve(aiSummary) : fetchAISummaryDedupe(isbn, { signal })
             ]);
 
-            if (revRes.status === 'fulfilled') reviews = revRes.value; else console.log('Reviews not available:', revRes.reason?.message || revRes.reason);
-            if (ratRes.status === 'fulfilled') rating = ratRes.value; else console.log('Rating not available:', ratRes.reason?.message || ratRes.reason);
-            if (tagRes.status === 'fulfilled') tags = tagRes.value; else console.log('Tags not available:', tagRes.reason?.message || tagRes.reason);
+            if (bundleRes.status === 'fulfilled') {
+                reviews = bundleRes.value.reviews || [];
+                rating = bundleRes.value.rating || rating;
+                tags = bundleRes.value.tags || [];
+            } else {
+                console.log('Reviews/rating/tags not available:', bundleRes.reason?.message || bundleRes.reason);
+            }
             if (simRes.status === 'fulfilled') similar = simRes.value; else console.log('Similar books not available:', simRes.reason?.message || simRes.reason);
             if (aiRes.status === 'fulfilled') aiSummary = aiRes.value; else aiSummary = aiSummary || null;
 
@@ -47,3 +47,174 @@ def test_add_book_with_invalid_api_key(client):
     payload = {"isbn": "9780321765723"}
     response = client.post("/books", headers=headers, json=payload)
     assert response.status_code == 403
+
+
+def test_cover_miss_is_cached_in_process(client, monkeypatch):
+    import src.api as api_module
+
+    calls = []
+
+    class FakeHTTPClient:
+        async def get_with_retry(self, url, retries=3, backoff=0.5, **kwargs):
+            calls.append(url)
+            return None
+
+        def stream(self, method, url, **kwargs):
+            calls.append(url)
+            return FakeStream()
+
+    class FakeStream:
+        status_code = 404
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def fake_get_http_client():
+        return FakeHTTPClient()
+
+    monkeypatch.setattr(api_module, "get_http_client", fake_get_http_client)
+
+    first = client.get("/covers/0000000000?size=M")
+    second = client.get("/covers/0000000000?size=M")
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.headers["content-type"].startswith("image/svg+xml")
+    # The second request must be served from the in-process LRU without refetching
+    assert len(calls) == 1
+
+
+def test_concurrent_cover_requests_share_one_fetch(client, monkeypatch):
+    import asyncio
+    import src.api as api_module
+
+    calls = []
+
+    class SlowStream:
+        status_code = 404
+
+        async def __aenter__(self):
+            await asyncio.sleep(0.05)
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeHTTPClient:
+        def stream(self, method, url, **kwargs):
+            calls.append(url)
+            return SlowStream()
+
+    async def fake_get_http_client():
+        return FakeHTTPClient()
+
+    monkeypatch.setattr(api_module, "get_http_client", fake_get_http_client)
+
+    from starlette.requests import Request
+
+    request = Request({"type": "http", "method": "GET", "path": "/covers/1111111111", "headers": []})
+
+    async def burst():
+        return await asyncio.gather(
+            *(api_module.get_book_cover(request, "1111111111", size="S") for _ in range(5))
+        )
+
+    responses = asyncio.run(burst())
+    assert all(r.status_code == 200 for r in responses)
+    assert len(calls) == 1
+
+
+def test_get_books_honours_if_none_match(client):
+    first = client.get("/books")
+    etag = first.headers.get("etag")
+    assert etag
+
+    cached = client.get("/books", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    headers = {"X-API-Key": settings.api_key}
+    payload = {"isbn": "9780000000001", "title": "Etag Book", "author": "Someone"}
+    assert client.post("/books", headers=headers, json=payload).status_code == 200
+
+    # Any write bumps the library version, so the old ETag no longer matches
+    refreshed = client.get("/books", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+
+
+def test_detail_bundle_matches_individual_endpoints(client):
+    headers = {"X-API-Key": settings.api_key}
+    isbn = "9780000000002"
+    payload = {"isbn": isbn, "title": "Bundle Book", "author": "Someone"}
+    assert client.post("/books", headers=headers, json=payload).status_code == 200
+    for rating in (3, 5):
+        review = {"user_name": "reader", "rating": rating}
+        assert client.post(f"/books/{isbn}/reviews", json=review).status_code == 200
+    tag = client.post("/tags", json={"name": "bundle"}).json()
+    assert client.post(f"/books/{isbn}/tags", json=tag["id"]).status_code == 200
+
+    bundle = client.get(f"/books/{isbn}/detail-bundle").json()
+    assert bundle["reviews"] == client.get(f"/books/{isbn}/reviews").json()
+    assert bundle["rating"] == client.get(f"/books/{isbn}/rating").json()
+    assert bundle["tags"] == client.get(f"/books/{isbn}/tags").json()
+
+
+def test_tag_lists_follow_tag_writes(client):
+    headers = {"X-API-Key": settings.api_key}
+    isbn = "9780000000003"
+    payload = {"isbn": isbn, "title": "Tagged Book", "author": "Someone"}
+    assert client.post("/books", headers=headers, json=payload).status_code == 200
+    tag = client.post("/tags", json={"name": "cache-check"}).json()
+
+    def count():
+        return next(t["book_count"] for t in client.get("/tags").json() if t["id"] == tag["id"])
+
+    # Prime both cached lists before writing
+    assert count() == 0
+    assert client.get(f"/books/{isbn}/tags").json() == []
+
+    assert client.post(f"/books/{isbn}/tags", json=tag["id"]).status_code == 200
+    assert count() == 1
+    assert [t["id"] for t in client.get(f"/books/{isbn}/tags").json()] == [tag["id"]]
+
+    assert client.delete(f"/books/{isbn}/tags/{tag['id']}").status_code == 200
+    assert count() == 0
+    assert client.get(f"/books/{isbn}/tags").json() == []
+
+
+def test_bulk_tag_assignment_reports_each_tag(client):
+    headers = {"X-API-Key": settings.api_key}
+    isbn = "9780000000004"
+    payload = {"isbn": isbn, "title": "Bulk Tagged", "author": "Someone"}
+    assert client.post("/books", headers=headers, json=payload).status_code == 200
+    first = client.post("/tags", json={"name": "bulk-a"}).json()["id"]
+    second = client.post("/tags", json={"name": "bulk-b"}).json()["id"]
+    assert client.post(f"/books/{isbn}/tags", json=first).status_code == 200
+
+    resp = client.post(f"/books/{isbn}/tags/bulk", json=[first, second, second, 999999])
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["added"] == [second]
+    assert body["already_assigned"] == [first]
+    assert body["not_found"] == [999999]
+    assert sorted(t["id"] for t in client.get(f"/books/{isbn}/tags").json()) == sorted([first, second])
+
+
+def test_writes_for_book_deleted_after_check_return_404(client, monkeypatch):
+    import src.api as api_module
+    from src.book import Book
+
+    # Kitap varlık denetiminden sonra silinmiş gibi: yabancı anahtar hatası 500 yerine 404 olmalı
+    monkeypatch.setattr(api_module.library, "find_book", lambda isbn: Book("Gone", "Nobody", isbn))
+    tag = client.post("/tags", json={"name": "fk-check"}).json()
+
+    resp = client.post("/books/9780000000005/reviews", json={"user_name": "ali", "rating": 4})
+    assert resp.status_code == 404
+    resp = client.post("/books/9780000000005/tags", json=tag["id"])
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Kitap bulunamadı."
+    resp = client.post("/books/9780000000005/tags", json=999999)
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Etiket bulunamadı."
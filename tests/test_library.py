@@ -87,6 +87,78 @@ def test_update_book_not_found():
     updated_book = lib.update_book("nonexistent", title="New Title")
     assert updated_book is None
 
+def test_list_books_sorted_tracks_writes():
+    lib = Library()
+    lib.add_book(Book("beta", "Zed", "111"))
+    lib.add_book(Book("Alpha", "Young", "222"))
+
+    page, total = lib.list_books_sorted("title", "asc", 0, 10)
+    assert [b.isbn for b in page] == ["222", "111"]
+    assert total == 2
+
+    page, total = lib.list_books_sorted("author", "desc", 1, 1)
+    assert [b.isbn for b in page] == ["222"]
+    assert total == 2
+
+    # The sorted index is rebuilt after a write
+    lib.add_book(Book("Aardvark", "Xavier", "333"))
+    page, total = lib.list_books_sorted("title", "asc", 0, 2)
+    assert [b.isbn for b in page] == ["333", "222"]
+    assert total == 3
+
+def test_search_books_follows_updates_and_removals():
+    lib = Library()
+    lib.add_book(Book("Fluent Python", "Luciano Ramalho", "555"))
+    lib.add_book(Book("Dune", "Frank Herbert", "666"))
+
+    assert [b.isbn for b in lib.search_books("PYTH")] == ["555"]
+    assert [b.isbn for b in lib.search_books("herb")] == ["666"]
+
+    lib.update_book("555", title="Effective Python")
+    assert lib.search_books("fluent") == []
+    assert [b.isbn for b in lib.search_books("effective")] == ["555"]
+
+    lib.remove_book("666")
+    assert lib.search_books("herbert") == []
+
+def test_author_histogram_and_recent_books():
+    lib = Library()
+    lib.add_book(Book("Zebra", "Frank Herbert", "777"))
+    lib.add_book(Book("Dune", "Frank Herbert", "778"))
+    lib.add_book(Book("Emma", "Jane Austen", "779"))
+
+    assert lib.get_author_histogram() == [("Frank Herbert", 2), ("Jane Austen", 1)]
+    assert lib.get_author_histogram(limit=1) == [("Frank Herbert", 2)]
+    # Newest first, regardless of title order
+    assert [b.isbn for b in lib.recent_books(limit=2)] == ["779", "778"]
+
+def test_add_books_bulk_skips_existing_and_repeated_isbns():
+    lib = Library()
+    lib.add_book(Book("Dune", "Frank Herbert", "901"))
+
+    inserted, skipped = lib.add_books_bulk([
+        Book("Emma", "Jane Austen", "902"),
+        Book("Dune again", "Someone", "901"),
+        Book("Emma copy", "Jane Austen", "9-02"),
+        Book("Ulysses", "James Joyce", "903"),
+    ])
+
+    assert inserted == 2
+    assert sorted(skipped) == ["901", "902"]
+    assert lib.find_book("901").title == "Dune"
+    assert lib.find_book("902").title == "Emma"
+    assert lib.find_book("903") is not None
+
+def test_add_or_get_book_returns_existing_on_conflict():
+    lib = Library()
+    book, created = lib.add_or_get_book(Book("Dune", "Frank Herbert", "911"))
+    assert created is True
+    assert book.created_at is not None
+
+    existing, created = lib.add_or_get_book(Book("Unknown", "Unknown", "9-11"))
+    assert created is False
+    assert existing.title == "Dune"
+
 def test_add_book_by_isbn_success(monkeypatch):
     lib = Library()
 
@@ -127,4 +199,34 @@ def test_add_book_by_isbn_not_found(monkeypatch):
 
     monkeypatch.setattr("src.library.httpx.get", fake_get)
     with pytest.raises(LookupError):
-        lib.add_book_by_isbn("0000000000")
\ No newline at end of file
+        lib.add_book_by_isbn("0000000000")
+def test_create_tables_upgrades_v3_database_with_orphans():
+    from src import database
+
+    db_file = database.DATABASE_FILE
+    for path in (db_file, db_file + "-wal", db_file + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    # v3 şeması: isbn birincil anahtar, örtük rowid; foreign_keys kapalıyken kalmış sahipsiz satırlar
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE books (isbn TEXT PRIMARY KEY, title TEXT NOT NULL, author TEXT NOT NULL, cover_url TEXT)")
+    conn.executescript(database._SCHEMA_SQL)
+    conn.executemany("INSERT INTO books (isbn, title, author) VALUES (?, ?, ?)",
+                     [("1", "Dune", "Frank Herbert"), ("2", "Emma", "Jane Austen")])
+    conn.executemany("INSERT INTO reviews (isbn, user_name, rating) VALUES (?, ?, ?)",
+                     [("2", "ali", 5), ("gone", "veli", 1)])
+    conn.execute("INSERT INTO tags (id, name) VALUES (1, 'Okunacaklar')")
+    conn.executemany("INSERT INTO book_tags (isbn, tag_id) VALUES (?, ?)", [("1", 1), ("gone", 1), ("1", 99)])
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+    conn.close()
+
+    database.create_tables()
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT id, isbn FROM books ORDER BY id").fetchall() == [(1, "1"), (2, "2")]
+    assert conn.execute("SELECT isbn FROM reviews").fetchall() == [("2",)]
+    assert conn.execute("SELECT isbn, tag_id FROM book_tags").fetchall() == [("1", 1)]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    conn.close()
+    assert [b.isbn for b in Library().search_books("Emma")] == ["2"]